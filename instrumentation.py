@@ -0,0 +1,120 @@
+# Instrumentação opcional dos jogos (xadrez.py e snake.py)
+#
+# Nada aqui é usado se o jogo não for aberto com --profile: os métodos medidos só são
+# trocados por versões cronometradas quando a instrumentação é ligada, então o jogo
+# normal não paga nem um "if" por chamada.
+#
+# Com ela ligada:
+#   - cada método embrulhado conta chamadas, tempo total e tempo máximo;
+#   - um texto no canvas mostra os números ao vivo;
+#   - ao sair, grava JSON (--profile-json) e/ou um arquivo do cProfile (--cprofile),
+#     que pode ser aberto com python -m pstats ou snakeviz.
+
+import cProfile
+import json
+import time
+
+
+class Instrumentation:
+    def __init__(self):
+        self.timers = {}  # nome -> [chamadas, segundos no total, maior duração]
+        self.counters = {}
+        self.started = time.perf_counter()
+        self.profiler = None
+        self.overlay = None
+
+    def wrap(self, obj, attribute, name=None):
+        # Troca obj.attribute (na instância, não na classe) por uma versão cronometrada
+        function = getattr(obj, attribute)
+        timer = self.timers.setdefault(name or attribute, [0, 0.0, 0.0])
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                timer[0] += 1
+                timer[1] += elapsed
+                if elapsed > timer[2]:
+                    timer[2] = elapsed
+
+        setattr(obj, attribute, timed)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def count_calls(self, obj, attribute, name=None):
+        # Como wrap, mas só conta as chamadas: para funções curtas demais para cronometrar
+        function = getattr(obj, attribute)
+        name = name or attribute
+        count = self.count
+
+        def counted(*args, **kwargs):
+            count(name)
+            return function(*args, **kwargs)
+
+        setattr(obj, attribute, counted)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        timers = {name: {'calls': calls, 'total_ms': total * 1000, 'mean_us': total / calls * 1e6 if calls else 0.0,
+                         'max_ms': longest * 1000}
+                  for name, (calls, total, longest) in self.timers.items()}
+        return {'elapsed_s': elapsed, 'timers': timers, 'counters': dict(self.counters)}
+
+    def lines(self):
+        lines = []
+        for name, (calls, total, longest) in self.timers.items():
+            if calls:
+                lines.append(f"{name}: {calls}x  {total / calls * 1e6:.0f} µs  máx {longest * 1000:.1f} ms")
+        lines.extend(f"{name}: {value}" for name, value in self.counters.items())
+        return lines
+
+    # ---- Texto ao vivo no canvas ----
+
+    def attach_overlay(self, window, canvas, x, y, extra=None, interval=500, fill='red'):
+        # extra: função que devolve linhas a mais (por exemplo, quadros por segundo)
+        self.overlay = canvas.create_text(x, y, anchor='nw', text='', fill=fill, font=("Courier", 10))
+
+        def refresh():
+            lines = (extra() if extra else []) + self.lines()
+            canvas.itemconfig(self.overlay, text='\n'.join(lines))
+            canvas.tag_raise(self.overlay)
+            window.after(interval, refresh)
+
+        window.after(interval, refresh)
+
+    # ---- Exportação ----
+
+    def start_cprofile(self):
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def dump(self, json_path=None, cprofile_path=None):
+        if self.profiler is not None:
+            self.profiler.disable()
+            if cprofile_path:
+                self.profiler.dump_stats(cprofile_path)
+        if json_path:
+            with open(json_path, 'w') as file:
+                json.dump(self.summary(), file, indent=2)
+        for line in self.lines():
+            print(line)
+
+
+def add_arguments(parser):
+    parser.add_argument('--profile', action='store_true', help="mede as partes do jogo e mostra os números na tela")
+    parser.add_argument('--profile-json', help="grava as medições em JSON ao sair (liga --profile)")
+    parser.add_argument('--cprofile', help="grava um perfil do cProfile ao sair (liga --profile)")
+
+
+def from_arguments(args):
+    # Instrumentation pedida na linha de comando, ou None (jogo sem nenhuma medição)
+    if not (args.profile or args.profile_json or args.cprofile):
+        return None
+    instrumentation = Instrumentation()
+    if args.cprofile:
+        instrumentation.start_cprofile()
+    return instrumentation
@@ -0,0 +1,94 @@
+# Gravação binária de partidas e leitura com mmap (usada por snake_replay.py e xadrez_replay.py)
+#
+# Uma gravação são três arquivos, todos só acrescentados durante o jogo:
+#   arquivo        cabeçalho + um registro de tamanho fixo por passo/jogada
+#   arquivo.key    quadros-chave: o estado completo do jogo a cada `interval` registros
+#   arquivo.idx    posição e tamanho de cada quadro-chave em arquivo.key (12 bytes cada)
+# Como os registros têm tamanho fixo e os quadros-chave são periódicos, ir para o
+# registro i é aritmética: quadro-chave i // interval e no máximo interval - 1
+# registros reaplicados a partir dele.
+
+import mmap
+import struct
+
+MAGIC = b'MONIREC1'
+HEADER = struct.Struct('<8sBxHI16s')  # Assinatura, tipo de jogo, tamanho do registro, intervalo, dados do jogo
+KEY_ENTRY = struct.Struct('<QI')  # Posição e tamanho do quadro-chave
+SNAKE, CHESS = 0, 1
+
+
+class Recorder:
+    def __init__(self, path, kind, record_size, interval, extra=b''):
+        self.record_size = record_size
+        self.interval = interval
+        self.count = 0
+        # Escrita com buffer: gravar um registro é só copiar bytes para a memória
+        self.events = open(path, 'wb')
+        self.keys = open(path + '.key', 'wb')
+        self.index = open(path + '.idx', 'wb')
+        self.events.write(HEADER.pack(MAGIC, kind, record_size, interval, extra))
+        self.key_offset = 0
+
+    def due(self):
+        # Se o próximo registro precisa de um quadro-chave antes dele
+        return self.count % self.interval == 0
+
+    def keyframe(self, snapshot):
+        self.index.write(KEY_ENTRY.pack(self.key_offset, len(snapshot)))
+        self.keys.write(snapshot)
+        self.key_offset += len(snapshot)
+
+    def record(self, data):
+        self.events.write(data)
+        self.count += 1
+
+    def close(self):
+        for file in (self.events, self.keys, self.index):
+            file.close()
+
+
+def _map(path):
+    file = open(path, 'rb')
+    size = file.seek(0, 2)
+    return file, (mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b'')
+
+
+class Recording:
+    def __init__(self, path, kind):
+        self.files = []
+        self.events = self._open(path)
+        magic, file_kind, self.record_size, self.interval, self.extra = HEADER.unpack_from(self.events, 0)
+        if magic != MAGIC or file_kind != kind:
+            raise ValueError(f"{path} não é uma gravação deste jogo")
+        self.keys = self._open(path + '.key')
+        self.index = self._open(path + '.idx')
+        # Jogo interrompido: os três arquivos têm buffers separados, então um registro
+        # incompleto no fim é ignorado e só valem os quadros-chave inteiros em .key
+        self.count = (len(self.events) - HEADER.size) // self.record_size
+        self.keyframes = 0
+        for key in range(len(self.index) // KEY_ENTRY.size):
+            offset, size = KEY_ENTRY.unpack_from(self.index, key * KEY_ENTRY.size)
+            if offset + size > len(self.keys):
+                break
+            self.keyframes = key + 1
+
+    def _open(self, path):
+        file, data = _map(path)
+        self.files.append((file, data))
+        return data
+
+    def record(self, index):
+        offset = HEADER.size + index * self.record_size
+        return self.events[offset:offset + self.record_size]
+
+    def keyframe(self, index):
+        # (número do registro do quadro-chave, estado) do quadro-chave mais próximo antes de index
+        key = min(index // self.interval, self.keyframes - 1)
+        offset, size = KEY_ENTRY.unpack_from(self.index, key * KEY_ENTRY.size)
+        return key * self.interval, self.keys[offset:offset + size]
+
+    def close(self):
+        for file, data in self.files:
+            if isinstance(data, mmap.mmap):
+                data.close()
+            file.close()
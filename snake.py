@@ -1,131 +1,204 @@
 from tkinter import *
 from tkinter.messagebox import showinfo
-import random
-
-
-class Square:
-
-    def __init__(self, x, y, color):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.velx = 0
-        self.vely = 0
-        self.dim = [0, 0, 0, 20, 20, 20, 20, 0]
-
-    def setVel(self, newx, newy):
-        self.velx = newx
-        self.vely = newy
-
-    def pos(self):
-        return [self.dim[0] + self.x, self.dim[1] + self.y, self.dim[2] + self.x, self.dim[3] + self.y,
-                self.dim[4] + self.x, self.dim[5] + self.y, self.dim[6] + self.x, self.dim[7] + self.y]
-
-    def update(self):
-        if 0 < self.x < width - grid_size:
-            self.x += self.velx
-        if 0 < self.y < height - grid_size:
-            self.y += self.vely
-        if self.x == 0 and self.velx > 0:
-            self.x += self.velx
-        if self.x == width - grid_size and self.velx < 0:
-            self.x += self.velx
-        if self.y == 0 and self.vely > 0:
-            self.y += self.vely
-        if self.y == height - grid_size and self.vely < 0:
-            self.y += self.vely
+import argparse
+import time
+from collections import deque
+
+import instrumentation
+from snake_autopilot import Autopilot
+from snake_core import DOWN, LEFT, RIGHT, UP, SnakeSim
+from snake_replay import SnakeRecorder, SnakeReplay
+
+TICK = 0.070  # Passo fixo da simulação (segundos)
+FRAME = 0.016  # Intervalo do laço de desenho (segundos)
+MAX_CATCH_UP = 5  # Máximo de passos atrasados recuperados num só quadro
 
 
 class Game:
 
-    def __init__(self):
+    def __init__(self, seed=None, autopilot=False, profile=None, record=None, replay=None):
         self.window = Tk()
         self.window.attributes("-fullscreen", True)  # Modo tela cheia
 
-        global width, height, grid_size
-        width = self.window.winfo_screenwidth()  # Largura da tela
-        height = self.window.winfo_screenheight()  # Altura da tela
-        grid_size = 20  # Tamanho do grid permanece o mesmo
+        self.width = self.window.winfo_screenwidth()  # Largura da tela
+        self.height = self.window.winfo_screenheight()  # Altura da tela
+        self.grid_size = 20  # Tamanho do grid permanece o mesmo
 
-        self.canvas = Canvas(self.window, bg='black', width=width, height=height)  # Fundo da tela branco
+        self.canvas = Canvas(self.window, bg='black', width=self.width, height=self.height)  # Fundo da tela branco
         self.canvas.pack()
 
-        # Cobra amarela
-        s = Square(20, 20, 'yellow')
-        s1 = Square(20, 20, 'yellow')
-        s2 = Square(20, 20, 'yellow')
-        s3 = Square(20, 20, 'yellow')
-
-        # Comida azul
-        f = Square(random.randint(grid_size, (width // grid_size)) * grid_size - grid_size,
-                   random.randint(grid_size, (height // grid_size)) * grid_size - grid_size, 'blue')
-
-        self.snake = [s, s1, s2, s3]
-        self.food = [f]
-        self.vel = [[20, 0], [0, 0], [0, 0], [0, 0]]
-
-        self.window.bind("<Up>", self.moveUp)
-        self.window.bind("<Down>", self.moveDown)
-        self.window.bind("<Right>", self.moveRight)
-        self.window.bind("<Left>", self.moveLeft)
+        # As regras ficam em snake_core.SnakeSim; aqui só se desenha o estado dela.
+        # Reproduzindo uma gravação (snake_replay.py), a simulação é a da reprodução
+        self.replay = replay
+        if replay is None:
+            self.sim = SnakeSim(self.width // self.grid_size, self.height // self.grid_size, seed)
+        else:
+            self.sim = replay.sim
+        self.action = None  # Última tecla de direção ainda não aplicada
+        self.autopilot = Autopilot() if autopilot and replay is None else None  # Joga sozinho no lugar das setas
+        self.recorder = SnakeRecorder(record, self.sim) if record else None
+        self.step = self.recorder.step if self.recorder is not None else self.sim.step
+
+        # Itens do canvas criados uma vez e reaproveitados: o retângulo da cauda é movido
+        # para a nova cabeça. Os passos ainda não desenhados ficam em pending.
+        self.items = deque(self.canvas.create_rectangle(*self.cell_coords(cell), fill='yellow', width=0)
+                           for cell in self.sim.body)
+        self.pending = []
+        self.food_item = None
+        self.drawn_food = None
+
+        if self.autopilot is None and self.replay is None:
+            self.window.bind("<Up>", self.moveUp)
+            self.window.bind("<Down>", self.moveDown)
+            self.window.bind("<Right>", self.moveRight)
+            self.window.bind("<Left>", self.moveLeft)
         self.window.bind("<Escape>", self.exit_fullscreen)  # Sair da tela cheia ao pressionar "Esc"
 
+        # Contagens do laço e duração do último quadro (em milissegundos); o tempo de cada
+        # fase fica com a instrumentação (--profile)
+        self.stats = {'frames': 0, 'ticks': 0, 'skipped': 0, 'frame_ms': 0.0}
+
+        # Instrumentação opcional (instrumentation.py): cronometra as fases do laço e
+        # conta os testes de colisão
+        self.profile = profile
+        if profile is not None:
+            profile.wrap(self, 'frame', 'quadro')
+            profile.wrap(self, 'tick', 'simulação')
+            profile.wrap(self, 'draw', 'desenho')
+            profile.count_calls(self.sim, 'collides', 'colisões')
+            if self.autopilot is not None:
+                profile.wrap(self.autopilot, 'choose', 'piloto')
+            profile.attach_overlay(self.window, self.canvas, 10, 10, self.stats_lines, fill='white')
+
+    def stats_lines(self):
+        stats = self.stats
+        return [f"quadro {stats['frame_ms']:.1f} ms  passos {stats['ticks']}  descartados {stats['skipped']}",
+                f"tamanho {len(self.sim.body)}  comidas {self.sim.score}"]
+
+    def cell_coords(self, cell):
+        x, y = cell[0] * self.grid_size, cell[1] * self.grid_size
+        return x, y, x + self.grid_size, y + self.grid_size
+
     def exit_fullscreen(self, event):
         self.window.attributes("-fullscreen", False)  # Sair do modo tela cheia
 
+    # A simulação ignora a volta na direção oposta à do último passo
     def moveUp(self, event):
-        if self.vel[0] != [0, 20]:
-            self.vel[0] = [0, -20]
+        self.action = UP
 
     def moveDown(self, event):
-        if self.vel[0] != [0, -20]:
-            self.vel[0] = [0, 20]
+        self.action = DOWN
 
     def moveRight(self, event):
-        if self.vel[0] != [-20, 0]:
-            self.vel[0] = [20, 0]
+        self.action = RIGHT
 
     def moveLeft(self, event):
-        if self.vel[0] != [20, 0]:
-            self.vel[0] = [-20, 0]
+        self.action = LEFT
 
     def run(self):
-        counter = 0
-        while True:
-            self.canvas.delete('all')
-
-            for i in range(len(self.vel) - 1, 0, -1):
-                self.vel[i] = self.vel[i - 1]
+        # O laço é conduzido pelo after() do Tk: a simulação anda em passos fixos de
+        # TICK e o desenho só acontece quando algum passo mudou o estado
+        self.running = True
+        self.accumulator = 0.0
+        self.last_time = time.perf_counter()
+        self.window.after(0, self.frame)
+        self.window.mainloop()
+
+    def frame(self):
+        if not self.running:
+            return
+        now = time.perf_counter()
+        elapsed = now - self.last_time
+        self.last_time = now
+        self.stats['frames'] += 1
+        self.stats['frame_ms'] = elapsed * 1000
+
+        # Quadro demorado: recupera até MAX_CATCH_UP passos e descarta o atraso restante,
+        # para o jogo não disparar depois de uma pausa longa
+        self.accumulator += elapsed
+        steps = 0
+        while self.accumulator >= TICK and steps < MAX_CATCH_UP and self.running:
+            self.stats['ticks'] += 1
+            self.tick()
+            self.accumulator -= TICK
+            steps += 1
+        if not self.running:
+            return  # game_over já destruiu a janela
+        if self.accumulator >= TICK:
+            self.stats['skipped'] += int(self.accumulator // TICK)
+            self.accumulator %= TICK
+
+        if steps:
+            self.draw()
+
+        # Próximo quadro descontando o tempo gasto neste
+        spent = time.perf_counter() - now
+        self.window.after(max(1, int((FRAME - spent) * 1000)), self.frame)
+
+    def tick(self):
+        if self.replay is not None:
+            _, _, done = self.replay.step()
+        else:
+            if self.autopilot is not None:
+                self.action = self.autopilot.choose(self.sim)
+            _, _, done = self.step(self.action)
+            self.action = None
+        if done:
+            self.game_over()
+            return
+        self.pending.append((self.sim.body[0], self.sim.grew))
+
+    def draw(self):
+        # Aplica só o que mudou desde o último desenho
+        for head, grew in self.pending:
+            if grew:
+                item = self.canvas.create_rectangle(*self.cell_coords(head), fill='yellow', width=0)
+            else:
+                item = self.items.pop()
+                self.canvas.coords(item, *self.cell_coords(head))
+            self.items.appendleft(item)
+        self.pending.clear()
 
-            for i in range(len(self.vel)):
-                self.snake[i].velx = self.vel[i][0]
-                self.snake[i].vely = self.vel[i][1]
-
-            if self.snake[0].pos() == self.food[0].pos():
-                self.food[0].x = random.randint(grid_size, (width // grid_size)) * grid_size - grid_size
-                self.food[0].y = random.randint(grid_size, (height // grid_size)) * grid_size - grid_size
-                self.vel.append([0, 0])
-                self.snake.append(Square(self.snake[-1].x, self.snake[-1].y, self.snake[0].color))
-
-            for s in self.snake:
-                s.update()
-                self.canvas.create_polygon(s.pos(), fill=s.color)
-
-            for f in self.food:
-                f.update()
-                self.canvas.create_polygon(f.pos(), fill=f.color)
-
-            for i in range(2, len(self.snake)):
-                if counter < 1:
-                    counter += 1
-                elif self.snake[0].pos() == self.snake[i].pos():
-                    showinfo(title="Game Over", message=":( GAME OVER :( ")
-                    exit()
-
-            self.canvas.after(70)
-            self.window.update_idletasks()
-            self.window.update()
-
-
-g = Game()
-g.run()
+        # Comida azul
+        if self.sim.food != self.drawn_food:
+            if self.food_item is None:
+                self.food_item = self.canvas.create_rectangle(*self.cell_coords(self.sim.food), fill='blue', width=0)
+            else:
+                self.canvas.coords(self.food_item, *self.cell_coords(self.sim.food))
+            self.drawn_food = self.sim.food
+
+    def game_over(self):
+        self.running = False
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.profile is not None:
+            # Números do laço e do piloto saem junto com as medições (--profile)
+            self.profile.count('passos', self.stats['ticks'])
+            self.profile.count('quadros', self.stats['frames'])
+            self.profile.count('passos descartados', self.stats['skipped'])
+            if self.autopilot is not None:
+                self.profile.count('buscas do piloto', self.autopilot.stats['searches'])
+        showinfo(title="Game Over", message=":( GAME OVER :( ")
+        self.window.destroy()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cobrinha")
+    parser.add_argument('--autopilot', action='store_true', help="a cobra joga sozinha (snake_autopilot.py)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--record', help="grava a partida neste arquivo (snake_replay.py)")
+    parser.add_argument('--replay', help="reproduz uma gravação em vez de jogar")
+    parser.add_argument('--start', type=int, default=0, help="passo da gravação onde a reprodução começa")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    profile = instrumentation.from_arguments(args)
+    replay = None
+    if args.replay:
+        replay = SnakeReplay(args.replay)
+        replay.seek(args.start)
+    g = Game(args.seed, args.autopilot, profile, args.record, replay)
+    g.run()
+    if g.recorder is not None:
+        g.recorder.close()
+    if profile is not None:
+        profile.dump(args.profile_json, args.cprofile)
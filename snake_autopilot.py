@@ -0,0 +1,210 @@
+# Piloto automático da cobrinha
+#
+# Planeja um caminho até a comida com BFS que leva em conta quando cada parte do
+# corpo sai da frente (a cauda anda a cada passo). O caminho fica guardado e é só
+# seguido nos passos seguintes: enquanto a cobra obedece ao plano, o corpo evolui
+# exatamente como previsto e não é preciso buscar de novo até a comida mudar.
+# Antes de aceitar um caminho, confere se depois de comer ainda dá para alcançar a
+# cauda; se não der, segue a própria cauda (o que sempre mantém uma saída).
+#
+#   python snake_autopilot.py --games 20 [--cols 96 --rows 54]
+
+import argparse
+import time
+from collections import deque
+
+from snake_core import DIRECTIONS, SnakeSim
+
+REPLAN_INTERVAL = 8  # Passos seguindo a cauda antes de tentar a comida de novo
+
+
+def neighbours(cell, cols, rows):
+    x, y = cell % cols, cell // cols
+    if y > 0:
+        yield cell - cols
+    if y < rows - 1:
+        yield cell + cols
+    if x < cols - 1:
+        yield cell + 1
+    if x > 0:
+        yield cell - 1
+
+
+def vacate_times(body, cols, grow):
+    # Passo a partir do qual cada célula do corpo (cabeça primeiro) fica livre
+    length = len(body)
+    return {y * cols + x: length - index + grow for index, (x, y) in enumerate(body)}
+
+
+def timed_bfs(start, goal, blocked, cols, rows):
+    # Menor caminho de start até goal em que cada célula é alcançada depois de ser
+    # liberada pelo corpo; devolve a lista de células (sem start) ou None
+    parents = {start: None}
+    frontier = [start]
+    step = 0
+    while frontier:
+        step += 1
+        next_frontier = []
+        for cell in frontier:
+            for neighbour in neighbours(cell, cols, rows):
+                if neighbour in parents or blocked.get(neighbour, 0) > step:
+                    continue
+                parents[neighbour] = cell
+                if neighbour == goal:
+                    path = []
+                    while neighbour != start:
+                        path.append(neighbour)
+                        neighbour = parents[neighbour]
+                    path.reverse()
+                    return path
+                next_frontier.append(neighbour)
+        frontier = next_frontier
+    return None
+
+
+def reachable_area(start, blocked, cols, rows, limit):
+    # Quantas células dá para alcançar a partir de start (até limit)
+    seen = {start}
+    stack = [start]
+    while stack and len(seen) < limit:
+        cell = stack.pop()
+        for neighbour in neighbours(cell, cols, rows):
+            if neighbour not in seen and neighbour not in blocked:
+                seen.add(neighbour)
+                stack.append(neighbour)
+    return len(seen)
+
+
+class Autopilot:
+
+    def __init__(self):
+        self.path = deque()  # Células planejadas, a partir do próximo passo
+        self.target = None  # Comida (ou cauda) para a qual o caminho foi planejado
+        self.following_tail = False
+        self.tail_steps = 0
+        # Instrumentação: custo do último passo e totais
+        self.stats = {'ticks': 0, 'searches': 0, 'cache_hits': 0, 'plan_ms': 0.0, 'total_ms': 0.0, 'max_ms': 0.0}
+
+    def choose(self, sim):
+        start = time.perf_counter()
+        action = self._choose(sim)
+        elapsed = (time.perf_counter() - start) * 1000
+        stats = self.stats
+        stats['ticks'] += 1
+        stats['plan_ms'] = elapsed
+        stats['total_ms'] += elapsed
+        stats['max_ms'] = max(stats['max_ms'], elapsed)
+        return action
+
+    def _choose(self, sim):
+        cols = sim.cols
+        head = sim.body[0][1] * cols + sim.body[0][0]
+        food = sim.food[1] * cols + sim.food[0] if sim.food is not None else None
+
+        # O plano continua valendo se a próxima célula está livre ou é a cauda que sai agora
+        tail = sim.body[-1][1] * cols + sim.body[-1][0]
+        plan_valid = self.path and (not sim.occupancy.cells[self.path[0]] or
+                                    (self.path[0] == tail and not sim.grow and len(sim.body) > 1))
+        if self.following_tail:
+            self.tail_steps += 1
+            if self.tail_steps >= REPLAN_INTERVAL or not self.path:
+                plan_valid = False
+        elif self.target != food:
+            plan_valid = False
+
+        if plan_valid:
+            self.stats['cache_hits'] += 1
+        else:
+            self._plan(sim, head, food)
+
+        if self.path:
+            return self._action(head, self.path.popleft(), cols)
+        return self._survive(sim, head)
+
+    def _plan(self, sim, head, food):
+        self.stats['searches'] += 1
+        cols, rows = sim.cols, sim.rows
+        blocked = vacate_times(sim.body, cols, sim.grow)
+        self.following_tail = False
+        self.tail_steps = 0
+        if food is not None:
+            path = timed_bfs(head, food, blocked, cols, rows)
+            if path and self._safe_after(sim, path):
+                self.path = deque(path)
+                self.target = food
+                return
+
+        # Sem caminho seguro até a comida: segue a cauda sem passar pela comida, o que
+        # faria a cobra crescer fora do previsto. Chegar onde a cauda estava não basta
+        # (o próprio caminho pode fechar a volta), então o caminho também é conferido
+        if food is not None:
+            blocked[food] = cols * rows
+        tail = sim.body[-1][1] * cols + sim.body[-1][0]
+        path = timed_bfs(head, tail, blocked, cols, rows) if len(sim.body) > 1 else None
+        if path and not self._safe_after(sim, path, False):
+            path = None
+        self.path = deque(path or ())
+        self.target = tail
+        self.following_tail = True
+
+    def _safe_after(self, sim, path, ate=True):
+        # Corpo virtual depois de seguir o caminho: a cauda continua alcançável?
+        cols = sim.cols
+        grown = min(sim.grow, len(path)) + ate
+        body = [(cell % cols, cell // cols) for cell in reversed(path)] + list(sim.body)
+        body = body[:len(sim.body) + grown]
+        if len(body) < 3:
+            return True
+        blocked = vacate_times(body, cols, max(sim.grow - len(path), 0) + ate)
+        tail = body[-1][1] * cols + body[-1][0]
+        head = body[0][1] * cols + body[0][0]
+        return timed_bfs(head, tail, blocked, cols, sim.rows) is not None
+
+    def _survive(self, sim, head):
+        # Sem plano: um passo por vez, preferindo vizinhos dos quais a cauda ainda é
+        # alcançável e, entre eles, o com mais espaço em volta
+        cols, rows = sim.cols, sim.rows
+        food = sim.food[1] * cols + sim.food[0] if sim.food is not None else None
+        blocked = vacate_times(sim.body, cols, sim.grow)
+        best, best_key = None, None
+        for neighbour in neighbours(head, cols, rows):
+            if blocked.get(neighbour, 0) > 1:
+                continue
+            safe = self._safe_after(sim, [neighbour], neighbour == food)
+            key = (safe, reachable_area(neighbour, blocked, cols, rows, len(sim.body) * 2))
+            if best_key is None or key > best_key:
+                best, best_key = neighbour, key
+        return self._action(head, best, cols) if best is not None else None
+
+    @staticmethod
+    def _action(head, cell, cols):
+        delta = cell - head
+        for action, (dx, dy) in enumerate(DIRECTIONS):
+            if dy * cols + dx == delta:
+                return action
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Joga partidas com o piloto automático, sem Tk")
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--cols', type=int, default=96)
+    parser.add_argument('--rows', type=int, default=54)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--max-ticks', type=int, default=200000)
+    args = parser.parse_args()
+
+    for game in range(args.games):
+        sim = SnakeSim(args.cols, args.rows, args.seed + game)
+        pilot = Autopilot()
+        done = False
+        while not done and sim.ticks < args.max_ticks:
+            _, _, done = sim.step(pilot.choose(sim))
+        stats = pilot.stats
+        print(f"partida {game + 1}: {sim.score} comidas em {sim.ticks} passos; "
+              f"plano {stats['total_ms'] / stats['ticks'] * 1000:.0f} µs/passo em média, "
+              f"máximo {stats['max_ms']:.1f} ms, {stats['searches']} buscas")
+
+
+if __name__ == "__main__":
+    main()
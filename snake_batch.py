@@ -0,0 +1,214 @@
+# Muitas partidas da cobrinha de uma vez com NumPy
+#
+# BatchSnake segue as regras de snake_core.SnakeSim, mas guarda N partidas em
+# vetores: cabeça, corpo em buffer circular, grade de ocupação e comida. step()
+# avança todas juntas e recomeça sozinho as que terminaram.
+#
+#   python snake_batch.py --sizes 1 10 100 1000 --steps 500
+#   python snake_batch.py --check [--seeds 30 --steps 3000]   (confere contra SnakeSim)
+
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from snake_autopilot import Autopilot
+from snake_core import DOWN, LEFT, RIGHT, START, START_GROWTH, UP, SnakeSim
+
+DX = np.array([0, 0, 1, -1], dtype=np.int64)  # Na ordem UP, DOWN, RIGHT, LEFT
+DY = np.array([-1, 1, 0, 0], dtype=np.int64)
+OPPOSITE = np.array([DOWN, UP, LEFT, RIGHT], dtype=np.int64)
+
+FOOD_TRIES = 8  # Sorteios vetorizados antes de procurar célula livre partida a partida
+
+
+class BatchSnake:
+
+    def __init__(self, n, cols, rows, seed=None):
+        self.n = n
+        self.cols = cols
+        self.rows = rows
+        self.size = cols * rows
+        self.rng = np.random.default_rng(seed)
+        self.rows_index = np.arange(n)
+
+        # O corpo é um buffer circular por partida: a cabeça fica em body[i, head_slot[i]]
+        # e a cauda length[i] - 1 posições atrás
+        self.body = np.zeros((n, self.size), dtype=np.int16 if self.size <= 32767 else np.int32)
+        self.head_slot = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        self.grow = np.zeros(n, dtype=np.int64)
+        self.direction = np.zeros(n, dtype=np.int64)
+        self.occupancy = np.zeros((n, self.size), dtype=np.uint8)
+        self.food = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        # Tamanho e comidas de cada partida no passo em que terminou (antes de recomeçar)
+        self.final_length = np.zeros(n, dtype=np.int64)
+        self.final_score = np.zeros(n, dtype=np.int64)
+        self.reset()
+
+    def reset(self, which=None):
+        which = self.rows_index if which is None else which
+        start = START[1] * self.cols + START[0]
+        self.occupancy[which] = 0
+        self.occupancy[which, start] = 1
+        self.body[which, 0] = start
+        self.head_slot[which] = 0
+        self.length[which] = 1
+        self.grow[which] = START_GROWTH
+        self.direction[which] = RIGHT
+        self.score[which] = 0
+        self.ticks[which] = 0
+        self.place_food(which)
+        return self.state()
+
+    def state(self):
+        return self.body[self.rows_index, self.head_slot], self.food, self.direction, self.length
+
+    def place_food(self, which):
+        # Sorteios em bloco e, para quem só achou células ocupadas, escolha entre
+        # as livres daquela partida (grade quase cheia)
+        pending = np.asarray(which)
+        for _ in range(FOOD_TRIES):
+            if not pending.size:
+                return
+            cells = self.rng.integers(0, self.size, pending.size)
+            free = self.occupancy[pending, cells] == 0
+            self.food[pending[free]] = cells[free]
+            pending = pending[~free]
+        for i in pending:
+            free = np.flatnonzero(self.occupancy[i] == 0)
+            self.food[i] = free[self.rng.integers(free.size)] if free.size else -1
+
+    def step(self, actions=None):
+        # actions: uma ação por partida (-1 mantém a direção). Devolve (estado, recompensa, fim);
+        # as partidas com fim já voltam recomeçadas no estado devolvido
+        rows = self.rows_index
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int64)
+            turn = (actions >= 0) & (actions != OPPOSITE[self.direction])
+            self.direction = np.where(turn, actions, self.direction)
+
+        head = self.body[rows, self.head_slot].astype(np.int64)
+        x = head % self.cols + DX[self.direction]
+        y = head // self.cols + DY[self.direction]
+        wall = (x < 0) | (x >= self.cols) | (y < 0) | (y >= self.rows)
+        new = np.where(wall, 0, y * self.cols + x)
+        self.ticks += 1
+
+        ate = (new == self.food) & ~wall
+        grew = ate | (self.grow > 0)
+        self.grow -= (self.grow > 0) & ~ate
+
+        # Cauda anda para quem não cresceu
+        moving = ~grew & ~wall
+        tail_slot = (self.head_slot - self.length + 1) % self.size
+        tails = self.body[rows, tail_slot]
+        self.occupancy[rows[moving], tails[moving]] = 0
+        self.length -= moving
+
+        hit = ~wall & (self.occupancy[rows, new] == 1)
+        done = wall | hit
+        alive = ~done
+
+        # Nova cabeça
+        self.head_slot = np.where(alive, (self.head_slot + 1) % self.size, self.head_slot)
+        self.body[rows[alive], self.head_slot[alive]] = new[alive]
+        self.occupancy[rows[alive], new[alive]] = 1
+        self.length += alive
+
+        reward = np.where(done, -1, np.where(ate, 1, 0))
+        self.score += ate
+        eaten = rows[ate & alive]
+        if eaten.size:
+            self.place_food(eaten)
+            done |= self.food == -1  # Grade cheia
+        finished = rows[done]
+        if finished.size:
+            self.final_length[finished] = self.length[finished]
+            self.final_score[finished] = self.score[finished]
+            self.reset(finished)
+        return self.state(), reward, done
+
+
+def compare(seed, steps, cols, rows, autopilot=False):
+    # Uma partida de BatchSnake contra SnakeSim com as mesmas ações e a mesma sequência de
+    # comidas (a do lote é copiada para a simulação). Devolve a primeira divergência ou None
+    batch = BatchSnake(1, cols, rows, seed)
+    sim = SnakeSim(cols, rows, seed)
+    rng = random.Random(seed)
+    pilot = Autopilot()
+
+    def copy_food():
+        food = int(batch.food[0])
+        sim.food = None if food < 0 else (food % cols, food // cols)
+
+    copy_food()
+    for tick in range(steps):
+        if autopilot:
+            action = pilot.choose(sim)
+            action = -1 if action is None else action
+        else:
+            action = rng.randrange(4) if rng.random() < 0.3 else -1
+        (head, _, _, length), reward, done = batch.step([action])
+        _, sim_reward, sim_done = sim.step(None if action < 0 else action)
+        if reward[0] != sim_reward or bool(done[0]) != sim_done:
+            return f"passo {tick}: recompensa {reward[0]} e fim {bool(done[0])} no lote, {sim_reward} e {sim_done}"
+        if sim_done:
+            if int(batch.final_length[0]) != len(sim.body) or int(batch.final_score[0]) != sim.score:
+                return f"passo {tick}: tamanho ou comidas diferentes no fim da partida"
+            sim.reset()
+            pilot = Autopilot()
+        elif (int(head[0]) != sim.body[0][1] * cols + sim.body[0][0] or int(length[0]) != len(sim.body)
+              or set(np.flatnonzero(batch.occupancy[0]).tolist()) != {y * cols + x for x, y in sim.body}):
+            return f"passo {tick}: cabeça, tamanho ou ocupação diferentes"
+        copy_food()
+    return None
+
+
+def check(seeds, steps, cols, rows):
+    failures = 0
+    for seed in range(seeds):
+        for autopilot in (False, True):
+            error = compare(seed, steps, cols, rows, autopilot)
+            player = 'piloto' if autopilot else 'aleatório'
+            print(f"{'ok   ' if error is None else 'FALHA'} semente {seed:3} {player:9} {error or ''}")
+            failures += error is not None
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Passos por segundo da simulação em lote")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--cols', type=int, default=96)
+    parser.add_argument('--rows', type=int, default=54)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--check', action='store_true',
+                        help="confere passo a passo contra snake_core.SnakeSim numa grade 12x9")
+    parser.add_argument('--seeds', type=int, default=30, help="partidas conferidas por jogador com --check")
+    args = parser.parse_args()
+
+    if args.check:
+        # Grade pequena (12x9), para a cobra crescer até encher a grade; --steps vale por partida
+        sys.exit(1 if check(args.seeds, args.steps, 12, 9) else 0)
+
+    print(f"{'partidas':>9} {'passos/s':>12} {'passos/s por partida':>21}")
+    for n in args.sizes:
+        env = BatchSnake(n, args.cols, args.rows, args.seed)
+        rng = np.random.default_rng(args.seed)
+        # Jogador aleatório: vira em 10% dos passos
+        actions = np.where(rng.random((args.steps, n)) < 0.1, rng.integers(0, 4, (args.steps, n)), -1)
+        start = time.perf_counter()
+        for step_actions in actions:
+            env.step(step_actions)
+        elapsed = time.perf_counter() - start
+        total = n * args.steps / elapsed
+        print(f"{n:9} {total:12.0f} {total / n:21.0f}")
+
+
+if __name__ == "__main__":
+    main()
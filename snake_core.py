@@ -0,0 +1,175 @@
+# Simulação da cobrinha sem Tk
+#
+# SnakeSim guarda todas as regras do jogo numa grade de tamanho explícito e com
+# semente própria; o snake.py só desenha o estado. Também serve para testar bots
+# e medir desempenho sem o limite de 70 ms por quadro:
+#
+#   python snake_core.py --ticks 1000000 [--cols 96 --rows 54 --seed 1]
+
+import argparse
+import random
+import struct
+import time
+from array import array
+from collections import deque
+
+# Ações (mesma ordem das teclas do snake.py)
+UP, DOWN, RIGHT, LEFT = range(4)
+DIRECTIONS = ((0, -1), (0, 1), (1, 0), (-1, 0))
+OPPOSITE = (DOWN, UP, LEFT, RIGHT)
+
+START = (1, 1)
+START_GROWTH = 3  # Começa numa célula e cresce mais 3 enquanto anda
+
+SNAPSHOT = struct.Struct('<IIBBII')  # Passos, comidas, direção, crescimento, comida, tamanho; depois o corpo
+NO_FOOD = 0xFFFFFFFF
+
+
+class Occupancy:
+    # Ocupação da grade: um byte por célula e a lista das células livres. slot guarda a
+    # posição de cada célula em free, para tirar ou devolver uma célula em O(1)
+
+    def __init__(self, size):
+        self.cells = bytearray(size)
+        self.free = list(range(size))
+        self.slot = array('l', range(size))
+
+    def occupy(self, cell):
+        self.cells[cell] = 1
+        index = self.slot[cell]
+        last = self.free.pop()
+        if last != cell:
+            self.free[index] = last
+            self.slot[last] = index
+
+    def release(self, cell):
+        self.cells[cell] = 0
+        self.slot[cell] = len(self.free)
+        self.free.append(cell)
+
+    def random_free(self, rng):
+        if not self.free:
+            return None
+        return self.free[rng.randrange(len(self.free))]
+
+
+class SnakeSim:
+
+    def __init__(self, cols, rows, seed=None):
+        self.cols = cols
+        self.rows = rows
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        # Células (coluna, linha) da cabeça até a cauda
+        self.body = deque([START])
+        self.grow = START_GROWTH
+        self.direction = RIGHT  # Direção do último passo
+        self.occupancy = Occupancy(self.cols * self.rows)
+        self.occupancy.occupy(START[1] * self.cols + START[0])
+        self.food = self.place_food()
+        self.score = 0
+        self.ticks = 0
+        self.grew = False  # Se o último passo manteve a cauda no lugar
+        self.done = False
+        return self.state()
+
+    def state(self):
+        return self.body[0], self.food, self.direction, len(self.body)
+
+    def snapshot(self):
+        # Estado em bytes (células do corpo como índices da grade), para gravações (snake_replay.py)
+        cols = self.cols
+        food = NO_FOOD if self.food is None else self.food[1] * cols + self.food[0]
+        body = array('I', (y * cols + x for x, y in self.body))
+        return SNAPSHOT.pack(self.ticks, self.score, self.direction, self.grow, food, len(body)) + body.tobytes()
+
+    def restore(self, data):
+        # Volta ao estado de snapshot(). O sorteio das próximas comidas não é restaurado:
+        # quem reproduz uma gravação usa as comidas gravadas
+        self.ticks, self.score, self.direction, self.grow, food, length = SNAPSHOT.unpack_from(data, 0)
+        cells = array('I')
+        cells.frombytes(data[SNAPSHOT.size:SNAPSHOT.size + 4 * length])
+        cols = self.cols
+        self.body = deque((cell % cols, cell // cols) for cell in cells)
+        self.occupancy = Occupancy(cols * self.rows)
+        for cell in cells:
+            self.occupancy.occupy(cell)
+        self.food = None if food == NO_FOOD else (food % cols, food // cols)
+        self.grew = False
+        self.done = False
+        return self.state()
+
+    def place_food(self):
+        # Sorteia direto entre as células livres: O(1) mesmo com a grade quase cheia
+        cell = self.occupancy.random_free(self.rng)
+        return None if cell is None else (cell % self.cols, cell // self.cols)
+
+    def collides(self, cell):
+        # Bate no próprio corpo; a cauda que anda neste passo já foi liberada
+        return self.occupancy.cells[cell[1] * self.cols + cell[0]]
+
+    def step(self, action=None):
+        # Um passo da simulação; action=None mantém a direção. Voltar na direção
+        # oposta à do último passo é ignorado. Devolve (estado, recompensa, fim).
+        if self.done:
+            return self.state(), 0, True
+        if action is not None and action != OPPOSITE[self.direction]:
+            self.direction = action
+        dx, dy = DIRECTIONS[self.direction]
+        head = (self.body[0][0] + dx, self.body[0][1] + dy)
+        self.ticks += 1
+        if not (0 <= head[0] < self.cols and 0 <= head[1] < self.rows):
+            self.done = True  # Bateu na parede
+            return self.state(), -1, True
+
+        ate = head == self.food
+        self.grew = ate or self.grow > 0
+        if self.grow > 0 and not ate:
+            self.grow -= 1
+        elif not self.grew:
+            tail = self.body.pop()
+            self.occupancy.release(tail[1] * self.cols + tail[0])
+
+        if self.collides(head):
+            self.done = True
+            return self.state(), -1, True
+        self.occupancy.occupy(head[1] * self.cols + head[0])
+        self.body.appendleft(head)
+
+        if not ate:
+            return self.state(), 0, False
+        self.score += 1
+        self.food = self.place_food()
+        if self.food is None:
+            self.done = True  # A cobra ocupou a grade inteira
+        return self.state(), 1, self.done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede passos por segundo da simulação sem Tk")
+    parser.add_argument('--ticks', type=int, default=1000000)
+    parser.add_argument('--cols', type=int, default=96)
+    parser.add_argument('--rows', type=int, default=54)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    # Jogador aleatório: vira de vez em quando e recomeça ao perder
+    sim = SnakeSim(args.cols, args.rows, args.seed)
+    rng = random.Random(args.seed)
+    games = 0
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        action = rng.randrange(4) if rng.random() < 0.1 else None
+        _, _, done = sim.step(action)
+        if done:
+            games += 1
+            sim.reset()
+    elapsed = time.perf_counter() - start
+    print(f"{args.ticks} passos em {elapsed:.2f} s: {args.ticks / elapsed:.0f} passos/s ({games} partidas)")
+
+
+if __name__ == "__main__":
+    main()
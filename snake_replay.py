@@ -0,0 +1,131 @@
+# Gravação e reprodução de partidas da cobrinha (formato em recording.py)
+#
+# Cada passo grava 5 bytes: a ação aplicada (-1 sem tecla) e a célula da comida
+# depois do passo. Com a comida gravada, a reprodução não depende da semente nem do
+# sorteio. A cada KEYFRAME_INTERVAL passos vai um SnakeSim.snapshot(), então ir para
+# qualquer passo custa um restore e no máximo KEYFRAME_INTERVAL - 1 passos.
+#
+# Uso:
+#   python snake.py --record partida.rec             (grava jogando; vale com --autopilot)
+#   python snake.py --replay partida.rec [--start 500]
+#   python snake_replay.py partida.rec               (reproduz sem janela e mede)
+#   python snake_replay.py partida.rec --autopilot   (grava uma partida do piloto sem janela)
+
+import argparse
+import random
+import struct
+import time
+
+from recording import SNAKE, Recorder, Recording
+from snake_autopilot import Autopilot
+from snake_core import NO_FOOD, SnakeSim
+
+TICK_RECORD = struct.Struct('<bI')  # Ação, comida depois do passo
+GRID = struct.Struct('<HH')  # Colunas e linhas, nos dados do jogo do cabeçalho
+KEYFRAME_INTERVAL = 256
+
+
+class SnakeRecorder:
+    def __init__(self, path, sim, interval=KEYFRAME_INTERVAL):
+        self.sim = sim
+        self.log = Recorder(path, SNAKE, TICK_RECORD.size, interval, GRID.pack(sim.cols, sim.rows))
+
+    def step(self, action=None):
+        # sim.step gravando o passo
+        sim, log = self.sim, self.log
+        if log.due():
+            log.keyframe(sim.snapshot())
+        result = sim.step(action)
+        food = sim.food
+        log.record(TICK_RECORD.pack(-1 if action is None else action,
+                                    NO_FOOD if food is None else food[1] * sim.cols + food[0]))
+        return result
+
+    def close(self):
+        self.log.close()
+
+
+class SnakeReplay:
+    def __init__(self, path):
+        self.log = Recording(path, SNAKE)
+        if not self.log.keyframes:
+            raise ValueError(f"{path} não tem nenhum passo gravado")
+        self.cols, self.rows = GRID.unpack_from(self.log.extra)
+        self.sim = SnakeSim(self.cols, self.rows)
+        self.tick = 0
+        self.seek(0)
+
+    def __len__(self):
+        return self.log.count
+
+    def seek(self, tick):
+        # Estado depois de `tick` passos gravados
+        tick = max(0, min(tick, self.log.count))
+        self.tick, snapshot = self.log.keyframe(tick)
+        self.sim.restore(snapshot)
+        while self.tick < tick:
+            self.step()
+        return self.sim
+
+    def step(self):
+        # Reaplica o próximo passo gravado; devolve (estado, recompensa, fim) como SnakeSim.step
+        sim = self.sim
+        if self.tick >= self.log.count:
+            return sim.state(), 0, True
+        action, food = TICK_RECORD.unpack(self.log.record(self.tick))
+        self.tick += 1
+        result = sim.step(None if action < 0 else action)
+        sim.food = None if food == NO_FOOD else (food % sim.cols, food // sim.cols)
+        return result
+
+    def close(self):
+        self.log.close()
+
+
+def record_autopilot(path, cols, rows, seed, max_ticks):
+    sim = SnakeSim(cols, rows, seed)
+    pilot = Autopilot()
+    recorder = SnakeRecorder(path, sim)
+    done = False
+    while not done and sim.ticks < max_ticks:
+        _, _, done = recorder.step(pilot.choose(sim))
+    recorder.close()
+    return sim
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduz uma gravação da cobrinha sem Tk e mede")
+    parser.add_argument('recording')
+    parser.add_argument('--autopilot', action='store_true', help="grava antes uma partida do piloto automático")
+    parser.add_argument('--cols', type=int, default=96)
+    parser.add_argument('--rows', type=int, default=54)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--max-ticks', type=int, default=200000)
+    parser.add_argument('--seeks', type=int, default=1000, help="saltos aleatórios medidos depois da reprodução")
+    args = parser.parse_args()
+
+    if args.autopilot:
+        start = time.perf_counter()
+        sim = record_autopilot(args.recording, args.cols, args.rows, args.seed, args.max_ticks)
+        print(f"gravados {sim.ticks} passos ({sim.score} comidas) em {time.perf_counter() - start:.2f} s")
+
+    replay = SnakeReplay(args.recording)
+    start = time.perf_counter()
+    done = False
+    while not done:
+        _, _, done = replay.step()
+    elapsed = time.perf_counter() - start
+    print(f"{replay.tick} passos reproduzidos em {elapsed:.3f} s: {replay.tick / max(elapsed, 1e-9):.0f} passos/s; "
+          f"{replay.sim.score} comidas, tamanho {len(replay.sim.body)}")
+
+    if len(replay) and args.seeks:
+        rng = random.Random(0)
+        start = time.perf_counter()
+        for _ in range(args.seeks):
+            replay.seek(rng.randrange(len(replay) + 1))
+        print(f"{(time.perf_counter() - start) / args.seeks * 1000:.2f} ms por salto")
+    replay.close()
+
+
+if __name__ == "__main__":
+    main()
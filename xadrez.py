@@ -1,8 +1,21 @@
+import argparse
+import queue
+import threading
 import tkinter as tk
 from tkinter import messagebox
 
+import instrumentation
+from xadrez_bitboard import (COLORS, EN_PASSANT, PIECE_TYPES, PROMOTION, START_FEN, Position, move_end, move_flag,
+                             move_promo, move_squares, move_start, row_col, square)
+from xadrez_book import Book
+from xadrez_cache import MoveCache
+from xadrez_engine import Engine
+from xadrez_pgn import fen_counters, find_game, format_game, move_to_san, parse_san
+from xadrez_replay import ChessRecorder, ChessReplay
+
 class JogoXadrez:
-    def __init__(self):
+    def __init__(self, engine_color=None, engine_time=1.0, fen=None, game=None, save_path='partida.pgn', books=(),
+                 profile=None, record=None, replay=None, replay_start=0, replay_delay=0):
         self.window = tk.Tk()
         self.window.title("Jogo de Xadrez")
 
@@ -22,11 +35,73 @@ class JogoXadrez:
         self.king_positions = {'yellow': (7, 4), 'black': (0, 4)}  # Posições dos reis
         self.castling_rights = {'yellow': {'short': True, 'long': True}, 'black': {'short': True, 'long': True}}
         self.en_passant = None  # Guardar a posição da jogada "en passant"
+        self.halfmove_clock = 0  # Meio-lances desde a última captura ou lance de peão (FEN)
+        self.fullmove_number = 1
+        self.start_fen = START_FEN  # Posição de onde a partida começou, para salvar em PGN
+        self.move_history = []  # Jogadas feitas desde start_fen
+        self.save_path = save_path
+
+        self.position = None  # Espelho em bitboards usado pela geração de jogadas
+        # Mapa de ataques por cor refeito a cada jogada. Desligado: o único leitor é um
+        # is_in_check por vez, mais barato que montar os dois mapas
+        self.cache_attacks = False
+        self.attack_maps = None
+        self.move_cache = MoveCache()  # Jogadas legais por hash da posição (clique, xeque-mate e motor)
+        self.game_over = False
+
+        # Itens do canvas reaproveitados entre jogadas
+        self.piece_items = [[None] * self.board_size for _ in range(self.board_size)]
+        self.drawn = [[None] * self.board_size for _ in range(self.board_size)]  # Peça mostrada em cada casa
+        self.highlight_items = []
+        self.highlights_shown = 0
+
+        # Computador (opcional): busca numa thread separada para não travar o Tk
+        self.engine_color = engine_color
+        self.engine = Engine(time_limit=engine_time, books=books, move_cache=self.move_cache) if engine_color else None
+        self.engine_results = queue.Queue()
+        self.engine_thinking = False
+
+        # Gravação (xadrez_replay.py): cada jogada de move_piece vai para o arquivo
+        self.recorder = ChessRecorder(record) if record else None
+
+        # Instrumentação opcional (instrumentation.py): cronometra geração de jogadas,
+        # detecção de xeque e desenho
+        self.profile = profile
+        if profile is not None:
+            for method in ('get_valid_moves', 'is_in_check', 'has_legal_moves', 'draw_pieces', 'draw_squares',
+                           'move_piece', 'check_checkmate'):
+                profile.wrap(self, method)
+            if self.engine is not None:
+                profile.wrap(self.engine, 'search', 'engine.search')
+            profile.attach_overlay(self.window, self.canvas, 4, 4, self.stats_lines)
 
         self.create_board()
-        self.setup_pieces()
+        # Reprodução de uma gravação: sem cliques; seta para a direita/esquerda anda uma
+        # jogada e, com replay_delay, as jogadas seguem sozinhas
+        self.replay = replay
+        self.replay_index = 0
+        self.replay_delay = replay_delay
+        if replay is not None:
+            self.engine_color = None
+            self.replay_goto(replay_start)
+            self.window.bind("<Right>", self.replay_forward)
+            self.window.bind("<Left>", self.replay_back)
+            if replay_delay:
+                self.window.after(replay_delay, self.replay_autoplay)
+        elif game is not None or fen:
+            if game is not None:
+                self.load_game(game)
+            else:
+                self.load_fen(fen)
+            self.check_checkmate()  # A posição carregada pode já ser mate ou afogamento
+        else:
+            self.setup_pieces()
 
         self.canvas.bind("<Button-1>", self.click)  # Bind para cliques no tabuleiro
+        self.window.bind("<Control-s>", self.save_game)
+
+        if self.turn == self.engine_color and not self.game_over:
+            self.start_engine()
 
     def create_board(self):
         # Criação do tabuleiro de xadrez (8x8)
@@ -45,8 +120,98 @@ class JogoXadrez:
         self.setup_major_pieces(0, 'black')
         self.setup_major_pieces(7, 'yellow')
 
+        self.sync_position()
         self.draw_pieces()
 
+    def load_fen(self, fen):
+        # Começa a partir de uma posição FEN (as brancas do FEN são as amarelas)
+        self.position = Position.from_fen(fen)
+        self.halfmove_clock, self.fullmove_number = fen_counters(fen)
+        self.start_fen = self.get_fen()
+        self.move_history = []
+        self.board = self.position.to_board()
+        self.turn = COLORS[self.position.turn]
+        self.king_positions = {color: row_col(self.position.king_sq[index]) for index, color in enumerate(COLORS)}
+        self.selected_piece = None
+        self.valid_moves = []
+        self.game_over = False
+        self.update_castling_rights()
+        self.update_en_passant()
+        self.update_attack_maps()
+        self.draw_pieces()
+
+    def get_fen(self):
+        return self.position.to_fen(self.halfmove_clock, self.fullmove_number)
+
+    def load_game(self, game):
+        # Reproduz uma partida lida por xadrez_pgn.read_games a partir da posição dela
+        self.load_fen(game.start_fen())
+        for san in game.moves:
+            self.play_move(parse_san(self.position, san))
+            self.turn = 'yellow' if self.turn == 'black' else 'black'
+
+    def play_move(self, move):
+        # move_piece a partir de uma jogada de xadrez_bitboard (motor, PGN e gravações)
+        start_row, start_col = row_col(move_start(move))
+        end_row, end_col = row_col(move_end(move))
+        promotion = PIECE_TYPES[move_promo(move)] if move_flag(move) == PROMOTION else 'queen'
+        self.move_piece(start_row, start_col, end_row, end_col, promotion)
+
+    def replay_goto(self, index):
+        # Vai direto para a posição depois de `index` jogadas (quadro-chave mais próximo)
+        position, halfmove, fullmove = self.replay.seek(index)
+        self.replay_index = max(0, min(index, len(self.replay)))
+        self.load_fen(position.to_fen(halfmove, fullmove))
+
+    def replay_forward(self, event=None):
+        if self.replay_index >= len(self.replay):
+            return False
+        self.play_move(self.replay.move(self.replay_index))
+        self.turn = 'yellow' if self.turn == 'black' else 'black'
+        self.replay_index += 1
+        return True
+
+    def replay_back(self, event=None):
+        if self.replay_index > 0:
+            self.replay_goto(self.replay_index - 1)
+
+    def replay_autoplay(self):
+        if self.replay_forward():
+            self.window.after(self.replay_delay, self.replay_autoplay)
+
+    def game_pgn(self, headers=None):
+        # Texto PGN da partida atual (jogadas convertidas para SAN a partir de start_fen)
+        position = Position.from_fen(self.start_fen)
+        sans = []
+        for move in self.move_history:
+            sans.append(move_to_san(position, move))
+            position.make_move(move)
+        headers = dict(headers or {'Event': 'Jogo de Xadrez'})
+        if self.start_fen != START_FEN:
+            headers.update(SetUp='1', FEN=self.start_fen)
+        return format_game(headers, sans)
+
+    def save_game(self, event=None):
+        with open(self.save_path, 'w', encoding='utf-8') as file:
+            file.write(self.game_pgn())
+        messagebox.showinfo("Partida salva", f"Partida salva em {self.save_path}\nFEN: {self.get_fen()}")
+
+    def sync_position(self):
+        # Reconstrói a posição em bitboards a partir do tabuleiro em lista de listas
+        self.position = Position.from_board(self.board, self.turn, self.castling_rights, self.en_passant)
+        self.update_attack_maps()
+
+    def update_attack_maps(self):
+        # Casas atacadas por cada cor na posição atual (opcional, ver cache_attacks)
+        if self.cache_attacks:
+            self.attack_maps = {color: self.position.attack_map(index) for index, color in enumerate(COLORS)}
+        else:
+            self.attack_maps = None
+
+    def stats_lines(self):
+        stats = self.move_cache.stats()
+        return [f"cache de jogadas: {stats['hits']} acertos, {stats['misses']} faltas, {stats['bytes'] // 1024} KiB"]
+
     def setup_major_pieces(self, row, color):
         # Peças maiores: Torres, Cavalos, Bispos, Rainha e Rei
         self.board[row][0] = self.board[row][7] = (color, 'rook')
@@ -56,30 +221,43 @@ class JogoXadrez:
         self.board[row][4] = (color, 'king')
 
     def draw_pieces(self):
-        self.canvas.delete("pieces")  # Apagar todas as peças desenhadas
+        # Atualiza todas as casas; depois de cada jogada só as casas tocadas são redesenhadas
         for row in range(self.board_size):
             for col in range(self.board_size):
-                piece = self.board[row][col]
-                if piece:
-                    self.draw_piece(row, col, piece)
+                self.draw_piece(row, col, self.board[row][col])
+
+    def draw_squares(self, squares):
+        for sq in squares:
+            row, col = row_col(sq)
+            self.draw_piece(row, col, self.board[row][col])
 
     def draw_piece(self, row, col, piece):
-        x1, y1 = col * self.cell_size, row * self.cell_size
-        x2, y2 = (col + 1) * self.cell_size, (row + 1) * self.cell_size
-        color, piece_type = piece
-        piece_symbol = self.get_piece_symbol(piece_type)
-        self.canvas.create_text((x1 + x2) // 2, (y1 + y2) // 2, text=piece_symbol,
-                                font=("Arial", 36), fill=color, tags="pieces")
-
-    def get_piece_symbol(self, piece_type):
+        # Cada casa tem um item de texto fixo no canvas; mudar a peça é só um itemconfig
+        if self.drawn[row][col] == piece and self.piece_items[row][col] is not None:
+            return
+        item = self.piece_items[row][col]
+        if item is None:
+            x1, y1 = col * self.cell_size, row * self.cell_size
+            x2, y2 = (col + 1) * self.cell_size, (row + 1) * self.cell_size
+            item = self.canvas.create_text((x1 + x2) // 2, (y1 + y2) // 2, text='',
+                                           font=("Arial", 36), tags="pieces")
+            self.piece_items[row][col] = item
+        if piece:
+            color, piece_type = piece
+            self.canvas.itemconfig(item, text=self.get_piece_symbol(piece_type, color), fill=color)
+        else:
+            self.canvas.itemconfig(item, text='')
+        self.drawn[row][col] = piece
+
+    def get_piece_symbol(self, piece_type, color):
         # Símbolos Unicode para peças de xadrez
         symbols = {
-            'king': '♔' if self.turn == 'yellow' else '♚',
-            'queen': '♕' if self.turn == 'yellow' else '♛',
-            'rook': '♖' if self.turn == 'yellow' else '♜',
-            'bishop': '♗' if self.turn == 'yellow' else '♝',
-            'knight': '♘' if self.turn == 'yellow' else '♞',
-            'pawn': '♙' if self.turn == 'yellow' else '♟'
+            'king': '♔' if color == 'yellow' else '♚',
+            'queen': '♕' if color == 'yellow' else '♛',
+            'rook': '♖' if color == 'yellow' else '♜',
+            'bishop': '♗' if color == 'yellow' else '♝',
+            'knight': '♘' if color == 'yellow' else '♞',
+            'pawn': '♙' if color == 'yellow' else '♟'
         }
         return symbols[piece_type]
 
@@ -89,6 +267,8 @@ class JogoXadrez:
 
         if not (0 <= row < self.board_size and 0 <= col < self.board_size):
             return
+        if self.engine_thinking or self.game_over or self.replay is not None:
+            return
 
         if self.selected_piece:
             if (row, col) in self.valid_moves:
@@ -105,7 +285,13 @@ class JogoXadrez:
                 self.highlight_moves(self.valid_moves)
 
     def get_valid_moves(self, row, col):
-        # Implementação básica para obtenção de movimentos válidos
+        # Destinos legais da peça, tirados da lista de jogadas legais da posição; a mesma
+        # lista (em cache) responde depois a has_legal_moves e à raiz do motor
+        return self.position.get_valid_moves(row, col, self.move_cache.legal_moves(self.position))
+
+    def get_list_moves(self, row, col):
+        # Geração original, varrendo a lista de listas; mantida como referência
+        # para comparação em xadrez_bench.py
         piece = self.board[row][col]
         piece_type = piece[1]
         color = piece[0]
@@ -245,65 +431,98 @@ class JogoXadrez:
         return moves
 
     def highlight_moves(self, moves):
-        for row, col in moves:
-            self.canvas.create_rectangle(col * self.cell_size, row * self.cell_size,
-                                         (col + 1) * self.cell_size, (row + 1) * self.cell_size,
-                                         outline='yellow', width=3, tags="highlight")
+        # Retângulos de destaque reaproveitados: só são criados quando faltam no conjunto
+        for index, (row, col) in enumerate(moves):
+            if index == len(self.highlight_items):
+                self.highlight_items.append(self.canvas.create_rectangle(0, 0, 0, 0, outline='yellow', width=3,
+                                                                         tags="highlight"))
+            item = self.highlight_items[index]
+            self.canvas.coords(item, col * self.cell_size, row * self.cell_size,
+                               (col + 1) * self.cell_size, (row + 1) * self.cell_size)
+            self.canvas.itemconfig(item, state='normal')
+        self.highlights_shown = len(moves)
 
     def clear_highlight(self):
-        self.canvas.delete("highlight")
+        for item in self.highlight_items[:self.highlights_shown]:
+            self.canvas.itemconfig(item, state='hidden')
+        self.highlights_shown = 0
 
-    def move_piece(self, start_row, start_col, end_row, end_col):
-        # Movimentação da peça e promoções
+    def move_piece(self, start_row, start_col, end_row, end_col, promotion='queen'):
+        # Movimentação da peça e promoções (pelo clique, o peão sempre é promovido a dama)
         piece = self.board[start_row][start_col]
-        self.board[end_row][end_col] = piece
-        self.board[start_row][start_col] = None
-
-        # Promoção de peão
-        if piece[1] == 'pawn' and (end_row == 0 or end_row == 7):
-            self.board[end_row][end_col] = (piece[0], 'queen')
-
-        # Roque
-        if piece[1] == 'king' and abs(end_col - start_col) == 2:
-            if end_col == 6:  # Roque curto
-                self.board[end_row][5] = self.board[end_row][7]
-                self.board[end_row][7] = None
-            elif end_col == 2:  # Roque longo
-                self.board[end_row][3] = self.board[end_row][0]
-                self.board[end_row][0] = None
-
-        # En passant
-        if piece[1] == 'pawn' and (end_row, end_col) == self.en_passant:
-            self.board[start_row][end_col] = None
+        move = self.position.find_move(square(start_row, start_col), square(end_row, end_col),
+                                       PIECE_TYPES.index(promotion))
+        capture = self.board[end_row][end_col] is not None or move_flag(move) == EN_PASSANT
+        if self.recorder is not None:
+            self.recorder.record(self.position, move, self.halfmove_clock, self.fullmove_number)
+        self.position.make_move(move)
+        self.move_history.append(move)
+
+        # Contadores de lances da FEN
+        self.halfmove_clock = 0 if capture or piece[1] == 'pawn' else self.halfmove_clock + 1
+        if piece[0] == 'black':
+            self.fullmove_number += 1
+
+        # Só as casas tocadas pela jogada (inclusive torre do roque e peão do en passant) mudam
+        touched = move_squares(move, COLORS.index(piece[0]))
+        for sq in touched:
+            row, col = row_col(sq)
+            self.board[row][col] = self.position.piece_at(sq)
+        if piece[1] == 'king':
+            self.king_positions[piece[0]] = (end_row, end_col)
 
         # Atualização de roque e en passant
-        self.update_castling_rights(piece, start_row, start_col)
-        self.update_en_passant(piece, start_row, end_row, start_col, end_col)
+        self.update_castling_rights()
+        self.update_en_passant()
+        self.update_attack_maps()
 
-        self.draw_pieces()
+        self.draw_squares(touched)
 
-    def update_castling_rights(self, piece, start_row, start_col):
-        # Se o rei ou a torre moverem, perdemos os direitos de roque
-        if piece[1] == 'king':
-            self.castling_rights[piece[0]]['short'] = False
-            self.castling_rights[piece[0]]['long'] = False
-        elif piece[1] == 'rook':
-            if start_col == 0:
-                self.castling_rights[piece[0]]['long'] = False
-            elif start_col == 7:
-                self.castling_rights[piece[0]]['short'] = False
-
-    def update_en_passant(self, piece, start_row, end_row, start_col, end_col):
+    def update_castling_rights(self):
+        # Se o rei ou a torre moverem (ou a torre for capturada), perdemos os direitos de roque
+        self.castling_rights = self.position.castling_rights()
+
+    def update_en_passant(self):
         # Atualiza a jogada en passant após movimento do peão
-        if piece[1] == 'pawn' and abs(end_row - start_row) == 2:
-            self.en_passant = (start_row + (end_row - start_row) // 2, start_col)
-        else:
-            self.en_passant = None
+        ep = self.position.en_passant
+        self.en_passant = row_col(ep) if ep is not None else None
 
     def switch_turn(self):
         self.turn = 'yellow' if self.turn == 'black' else 'black'
         #messagebox.showinfo("Vez do jogador", f"Agora é a vez das peças {self.turn}.")
         self.check_checkmate()
+        if not self.game_over and self.turn == self.engine_color:
+            self.start_engine()
+
+    def start_engine(self):
+        self.engine_thinking = True
+        worker = threading.Thread(target=self.engine_worker, args=(self.position.copy(),), daemon=True)
+        worker.start()
+        self.window.after(50, self.poll_engine)
+
+    def engine_worker(self, position):
+        # Roda fora da thread do Tk; o resultado (ou o erro da busca) volta pela fila
+        try:
+            self.engine_results.put(self.engine.search(position))
+        except Exception as error:
+            self.engine_results.put(error)
+
+    def poll_engine(self):
+        try:
+            result = self.engine_results.get_nowait()
+        except queue.Empty:
+            self.window.after(50, self.poll_engine)
+            return
+        self.engine_thinking = False
+        if isinstance(result, Exception):
+            # Sem o computador, as peças dele passam a ser jogadas no tabuleiro
+            self.engine_color = None
+            messagebox.showerror("Erro do computador", f"A busca falhou: {result}")
+            return
+        if result.move is None:
+            return
+        self.play_move(result.move)
+        self.switch_turn()
 
     def check_checkmate(self):
         king_position = self.find_king(self.turn)
@@ -312,55 +531,66 @@ class JogoXadrez:
                 messagebox.showinfo("Xeque", f"{self.turn.capitalize()} está em xeque!")
             else:
                 messagebox.showinfo("Xeque-Mate", f"{self.turn.capitalize()} está em xeque-mate!")
+                self.game_over = True
                 self.window.quit()
         else:
             if not self.has_legal_moves(self.turn):
                 messagebox.showinfo("Empate", "Jogo empatado por afogamento!")
+                self.game_over = True
                 self.window.quit()
 
     def find_king(self, color):
-        # Encontra a posição do rei de uma determinada cor
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                piece = self.board[row][col]
-                if piece and piece[0] == color and piece[1] == 'king':
-                    return (row, col)
-        return None
+        # Posição do rei, mantida por move_piece
+        return self.king_positions[color]
 
     def is_in_check(self, king_position, color):
-        # Verifica se o rei está em xeque (se alguma peça adversária pode capturar o rei)
-        opponent_color = 'black' if color == 'yellow' else 'yellow'
-        king_row, king_col = king_position
-
-        # Verifica todos os movimentos possíveis do oponente para ver se alguma pode capturar o rei
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                piece = self.board[row][col]
-                if piece and piece[0] == opponent_color:
-                    valid_moves = self.get_valid_moves(row, col, piece)
-                    if (king_row, king_col) in valid_moves:
-                        return True
-        return False
+        # Verifica se o rei está em xeque: pelo mapa de ataques guardado ou, sem ele,
+        # procurando atacantes a partir da casa do rei
+        opponent = COLORS.index(color) ^ 1
+        if self.attack_maps is not None:
+            return bool(self.attack_maps[COLORS[opponent]] >> square(*king_position) & 1)
+        return self.position.is_square_attacked(square(*king_position), opponent)
 
     def has_legal_moves(self, color):
         # Verifica se o jogador ainda tem algum movimento legal (se não tiver, é xeque-mate ou empate)
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                piece = self.board[row][col]
-                if piece and piece[0] == color:
-                    valid_moves = self.get_valid_moves(row, col, piece)
-                    for move in valid_moves:
-                        # Tentar o movimento e ver se ainda está em xeque
-                        temp_board = [row.copy() for row in self.board]
-                        self.board[move[0]][move[1]] = piece
-                        self.board[row][col] = None
-                        king_position = self.find_king(color)
-                        if not self.is_in_check(king_position, color):
-                            self.board = temp_board  # Reverte o tabuleiro para o estado original
-                            return True
-                        self.board = temp_board  # Reverte o tabuleiro para o estado original
-        return False
+        if COLORS.index(color) == self.position.turn:
+            return self.move_cache.has_legal_moves(self.position)
+        return self.position.has_legal_moves(COLORS.index(color))
 
 if __name__ == "__main__":
-    jogo = JogoXadrez()
+    parser = argparse.ArgumentParser(description="Jogo de Xadrez")
+    parser.add_argument('--engine', choices=COLORS, help="cor jogada pelo computador")
+    parser.add_argument('--engine-time', type=float, default=1.0, help="segundos de busca por jogada")
+    parser.add_argument('--fen', help="começa desta posição")
+    parser.add_argument('--pgn', help="continua uma partida salva (ver --game)")
+    parser.add_argument('--game', type=int, default=1, help="número da partida no arquivo --pgn")
+    parser.add_argument('--save', default='partida.pgn', help="arquivo gravado com Ctrl+S")
+    parser.add_argument('--book', action='append', default=[],
+                        help="livro de aberturas ou finais (xadrez_book.py) consultado pelo computador")
+    parser.add_argument('--record', help="grava as jogadas neste arquivo (xadrez_replay.py)")
+    parser.add_argument('--replay', help="reproduz uma gravação (setas andam uma jogada)")
+    parser.add_argument('--start', type=int, default=0, help="jogada da gravação onde a reprodução começa")
+    parser.add_argument('--replay-delay', type=int, default=0, help="milissegundos entre jogadas reproduzidas")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    profile = instrumentation.from_arguments(args)
+
+    game = None
+    if args.pgn:
+        game = find_game(args.pgn, args.game)
+        if game is None:
+            parser.error(f"{args.pgn} não tem a partida {args.game}")
+    books = [Book(path) for path in args.book]
+    replay = ChessReplay(args.replay) if args.replay else None
+    try:
+        jogo = JogoXadrez(engine_color=args.engine, engine_time=args.engine_time, fen=args.fen, game=game,
+                          save_path=args.save, books=books, profile=profile, record=args.record, replay=replay,
+                          replay_start=args.start, replay_delay=args.replay_delay)
+    except ValueError as error:
+        # Jogada ilegal ou ambígua na partida do PGN (ou FEN inválida)
+        parser.error(f"{args.pgn} (partida {args.game}): {error}" if game is not None else str(error))
     jogo.window.mainloop()
+    if jogo.recorder is not None:
+        jogo.recorder.close()
+    if profile is not None:
+        profile.dump(args.profile_json, args.cprofile)
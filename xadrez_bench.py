@@ -0,0 +1,146 @@
+# Benchmark: geração de jogadas na lista de listas do JogoXadrez x bitboards
+#
+# Uso: python xadrez_bench.py [--positions N] [--repeat N] [--seed N]
+# Não abre janela: o JogoXadrez é criado sem passar pelo __init__ (que cria o Tk).
+
+import argparse
+import random
+import time
+
+from xadrez import JogoXadrez
+from xadrez_bitboard import COLORS, Position
+from xadrez_cache import MoveCache
+
+
+def headless_game(board, turn, castling_rights, en_passant):
+    game = JogoXadrez.__new__(JogoXadrez)
+    game.board_size = 8
+    game.board = board
+    game.turn = turn
+    game.castling_rights = castling_rights
+    game.en_passant = en_passant
+    return game
+
+
+def initial_board():
+    game = headless_game([[None] * 8 for _ in range(8)], 'yellow', None, None)
+    for col in range(8):
+        game.board[1][col] = ('black', 'pawn')
+        game.board[6][col] = ('yellow', 'pawn')
+    game.setup_major_pieces(0, 'black')
+    game.setup_major_pieces(7, 'yellow')
+    return game.board
+
+
+def sample_positions(count, seed):
+    # Posições variadas obtidas com partidas aleatórias a partir da posição inicial
+    rng = random.Random(seed)
+    start = Position.from_board(initial_board())
+    positions = []
+    while len(positions) < count:
+        position = start.copy()
+        for _ in range(rng.randint(4, 60)):
+            moves = position.legal_moves()
+            if not moves:
+                break
+            position.make_move(rng.choice(moves))
+        position.history = []
+        positions.append(position)
+    return positions
+
+
+def to_game(position):
+    en_passant = divmod(position.en_passant, 8) if position.en_passant is not None else None
+    return headless_game(position.to_board(), COLORS[position.turn], position.castling_rights(), en_passant)
+
+
+# ---- Referência: varredura da lista de listas ----
+
+def list_all_moves(game, color):
+    moves = []
+    for row in range(8):
+        for col in range(8):
+            piece = game.board[row][col]
+            if piece and piece[0] == color:
+                moves.extend(((row, col), target) for target in game.get_list_moves(row, col))
+    return moves
+
+
+def list_find_king(game, color):
+    for row in range(8):
+        for col in range(8):
+            if game.board[row][col] == (color, 'king'):
+                return (row, col)
+    return None
+
+
+def list_is_in_check(game, color):
+    king = list_find_king(game, color)
+    opponent = 'black' if color == 'yellow' else 'yellow'
+    return any(target == king for _, target in list_all_moves(game, opponent))
+
+
+def list_has_legal_moves(game, color):
+    for (row, col), (new_row, new_col) in list_all_moves(game, color):
+        temp_board = [line.copy() for line in game.board]
+        game.board[new_row][new_col] = game.board[row][col]
+        game.board[row][col] = None
+        in_check = list_is_in_check(game, color)
+        game.board = temp_board
+        if not in_check:
+            return True
+    return False
+
+
+# ---- Medição ----
+
+def timed(function, items, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            function(item)
+    return (time.perf_counter() - start) / (repeat * len(items))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a lista de listas com os bitboards")
+    parser.add_argument('--positions', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=2024)
+    args = parser.parse_args()
+
+    positions = sample_positions(args.positions, args.seed)
+    games = [to_game(position) for position in positions]
+
+    benchmarks = [
+        ("get_valid_moves (todas as peças)",
+         lambda game: list_all_moves(game, game.turn),
+         lambda position: position.pseudo_legal_moves()),
+        ("is_in_check",
+         lambda game: list_is_in_check(game, game.turn),
+         lambda position: position.is_in_check(position.turn)),
+        ("has_legal_moves",
+         lambda game: list_has_legal_moves(game, game.turn),
+         lambda position: position.has_legal_moves()),
+    ]
+
+    print(f"{len(positions)} posições, {args.repeat} repetições")
+    print(f"{'operação':34} {'lista (µs)':>12} {'bitboard (µs)':>14} {'ganho':>8}")
+    for name, list_function, bitboard_function in benchmarks:
+        list_time = timed(list_function, games, args.repeat)
+        bitboard_time = timed(bitboard_function, positions, args.repeat)
+        print(f"{name:34} {list_time * 1e6:12.1f} {bitboard_time * 1e6:14.1f} {list_time / bitboard_time:7.1f}x")
+
+    # Mesmas posições consultadas de novo, como clique + check_checkmate + motor na mesma vez
+    cache = MoveCache()
+    for position in positions:
+        cache.legal_moves(position)
+    uncached = timed(Position.legal_moves, positions, args.repeat)
+    cached = timed(cache.legal_moves, positions, args.repeat)
+    stats = cache.stats()
+    print(f"{'legal_moves sem cache / com cache':34} {uncached * 1e6:12.1f} {cached * 1e6:14.1f} "
+          f"{uncached / cached:7.1f}x  ({stats['hits']} acertos, {stats['misses']} faltas, {stats['bytes']} bytes)")
+
+
+if __name__ == "__main__":
+    main()
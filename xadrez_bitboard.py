@@ -0,0 +1,755 @@
+# Núcleo do xadrez com bitboards (sem Tk)
+#
+# Cada casa do tabuleiro é um bit de um inteiro de 64 bits: casa = linha * 8 + coluna,
+# com a linha 0 no lado das pretas, igual ao JogoXadrez.board.
+
+import random
+
+YELLOW, BLACK = 0, 1
+COLORS = ('yellow', 'black')
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+PIECE_TYPES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+
+# Direitos de roque guardados em 4 bits
+YELLOW_SHORT, YELLOW_LONG, BLACK_SHORT, BLACK_LONG = 1, 2, 4, 8
+ALL_CASTLING = 15
+
+# Tipos de jogada (codificados nos bits 12-14 do inteiro da jogada)
+NORMAL, DOUBLE_PUSH, CASTLE, EN_PASSANT, PROMOTION = range(5)
+
+FULL = (1 << 64) - 1
+FILE_A = sum(1 << (row * 8) for row in range(8))
+FILE_H = FILE_A << 7
+
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+FEN_PIECES = 'pnbrqk'
+
+
+def square(row, col):
+    return row * 8 + col
+
+
+def parse_square(name):
+    # 'e3' -> casa; a linha 8 do tabuleiro é a linha 0 do JogoXadrez
+    return square(8 - int(name[1]), ord(name[0]) - ord('a'))
+
+
+def square_name(sq):
+    return 'abcdefgh'[sq & 7] + str(8 - (sq >> 3))
+
+
+def row_col(sq):
+    return sq >> 3, sq & 7
+
+
+def encode_move(start, end, flag=NORMAL, promo=0):
+    return start | (end << 6) | (flag << 12) | (promo << 15)
+
+
+def move_start(move):
+    return move & 63
+
+
+def move_end(move):
+    return (move >> 6) & 63
+
+
+def move_flag(move):
+    return (move >> 12) & 7
+
+
+def move_promo(move):
+    return move >> 15
+
+
+def move_name(move):
+    # Notação de coordenadas, como 'e2e4' ou 'a7a8q'
+    name = square_name(move & 63) + square_name((move >> 6) & 63)
+    if (move >> 12) & 7 == PROMOTION:
+        name += FEN_PIECES[move >> 15]
+    return name
+
+
+def iter_bits(bb):
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def _offset_table(offsets):
+    # Tabela de ataques para saltos fixos (cavalo e rei)
+    table = []
+    for sq in range(64):
+        row, col = row_col(sq)
+        bb = 0
+        for drow, dcol in offsets:
+            r, c = row + drow, col + dcol
+            if 0 <= r < 8 and 0 <= c < 8:
+                bb |= 1 << square(r, c)
+        table.append(bb)
+    return table
+
+
+KNIGHT_ATTACKS = _offset_table([(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)])
+KING_ATTACKS = _offset_table([(drow, dcol) for drow in (-1, 0, 1) for dcol in (-1, 0, 1) if drow or dcol])
+PAWN_ATTACKS = (_offset_table([(-1, -1), (-1, 1)]),  # Amarelo sobe no tabuleiro
+                _offset_table([(1, -1), (1, 1)]))    # Preto desce
+
+# Raios das peças deslizantes. Direções "positivas" aumentam o índice da casa,
+# então o primeiro bloqueador é o bit mais baixo; nas negativas é o mais alto.
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+def _ray_table(drow, dcol):
+    table = []
+    for sq in range(64):
+        row, col = row_col(sq)
+        bb = 0
+        r, c = row + drow, col + dcol
+        while 0 <= r < 8 and 0 <= c < 8:
+            bb |= 1 << square(r, c)
+            r += drow
+            c += dcol
+        table.append(bb)
+    return table
+
+
+def _square_rays(directions):
+    # Para cada casa: lista de (raio, positivo, tabela do raio) nas direções dadas
+    tables = [(_ray_table(drow, dcol), drow * 8 + dcol > 0) for drow, dcol in directions]
+    return [[(table[sq], positive, table) for table, positive in tables] for sq in range(64)]
+
+
+ROOK_RAYS = _square_rays(ROOK_DIRECTIONS)
+BISHOP_RAYS = _square_rays(BISHOP_DIRECTIONS)
+
+
+def _between_table():
+    # BETWEEN[a][b]: casas estritamente entre a e b quando estão na mesma linha, coluna
+    # ou diagonal (0 se não estão)
+    table = [[0] * 64 for _ in range(64)]
+    for sq in range(64):
+        row, col = row_col(sq)
+        for drow, dcol in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+            between = 0
+            r, c = row + drow, col + dcol
+            while 0 <= r < 8 and 0 <= c < 8:
+                table[sq][square(r, c)] = between
+                between |= 1 << square(r, c)
+                r += drow
+                c += dcol
+    return table
+
+
+BETWEEN = _between_table()
+
+
+def _slide(rays, occupied):
+    attacks = 0
+    for ray, positive, table in rays:
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                ray ^= table[(blockers & -blockers).bit_length() - 1]
+            else:
+                ray ^= table[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(sq, occupied):
+    return _slide(ROOK_RAYS[sq], occupied)
+
+
+def bishop_attacks(sq, occupied):
+    return _slide(BISHOP_RAYS[sq], occupied)
+
+
+def queen_attacks(sq, occupied):
+    return _slide(ROOK_RAYS[sq], occupied) | _slide(BISHOP_RAYS[sq], occupied)
+
+
+def pawn_attack_map(pawns, color):
+    # Casas atacadas por todos os peões de uma cor de uma só vez
+    if color == YELLOW:
+        return ((pawns & ~FILE_A) >> 9) | ((pawns & ~FILE_H) >> 7)
+    return (((pawns & ~FILE_A) << 7) | ((pawns & ~FILE_H) << 9)) & FULL
+
+
+# Máscaras de roque: mover ou capturar nestas casas remove os direitos correspondentes
+CASTLING_MASK = [ALL_CASTLING] * 64
+CASTLING_MASK[square(7, 4)] &= ~(YELLOW_SHORT | YELLOW_LONG)
+CASTLING_MASK[square(7, 7)] &= ~YELLOW_SHORT
+CASTLING_MASK[square(7, 0)] &= ~YELLOW_LONG
+CASTLING_MASK[square(0, 4)] &= ~(BLACK_SHORT | BLACK_LONG)
+CASTLING_MASK[square(0, 7)] &= ~BLACK_SHORT
+CASTLING_MASK[square(0, 0)] &= ~BLACK_LONG
+
+# (direito, casa do rei, destino do rei, casas que devem estar vazias, casa que o rei atravessa, torre de, torre para)
+CASTLING_MOVES = (
+    ((YELLOW_SHORT, square(7, 4), square(7, 6), (1 << square(7, 5)) | (1 << square(7, 6)),
+      square(7, 5), square(7, 7), square(7, 5)),
+     (YELLOW_LONG, square(7, 4), square(7, 2), (1 << square(7, 1)) | (1 << square(7, 2)) | (1 << square(7, 3)),
+      square(7, 3), square(7, 0), square(7, 3))),
+    ((BLACK_SHORT, square(0, 4), square(0, 6), (1 << square(0, 5)) | (1 << square(0, 6)),
+      square(0, 5), square(0, 7), square(0, 5)),
+     (BLACK_LONG, square(0, 4), square(0, 2), (1 << square(0, 1)) | (1 << square(0, 2)) | (1 << square(0, 3)),
+      square(0, 3), square(0, 0), square(0, 3))),
+)
+
+PROMOTION_PIECES = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# Destino do rei no roque -> (casa de origem da torre, casa de destino da torre)
+CASTLING_ROOKS = {king_to: (rook_from, rook_to)
+                  for moves in CASTLING_MOVES for _, _, king_to, _, _, rook_from, rook_to in moves}
+
+# Chaves de Zobrist: o hash da posição é o XOR das chaves de cada peça em sua casa,
+# dos direitos de roque, da coluna de en passant e da vez de jogar. A semente é
+# fixa para que o hash seja o mesmo em qualquer processo (livros, caches em disco).
+_zobrist_random = random.Random(0x5EED)
+ZOBRIST_PIECES = [[[_zobrist_random.getrandbits(64) for _ in range(64)] for _ in range(6)] for _ in range(2)]
+ZOBRIST_CASTLING = [_zobrist_random.getrandbits(64) for _ in range(16)]
+ZOBRIST_EN_PASSANT = [_zobrist_random.getrandbits(64) for _ in range(8)]
+ZOBRIST_TURN = _zobrist_random.getrandbits(64)
+
+
+def move_squares(move, color):
+    # Casas alteradas por uma jogada: origem, destino, peão capturado en passant e torre do roque
+    start, end, flag = move & 63, (move >> 6) & 63, (move >> 12) & 7
+    if flag == EN_PASSANT:
+        return [start, end, end + (8 if color == YELLOW else -8)]
+    if flag == CASTLE:
+        return [start, end, *CASTLING_ROOKS[end]]
+    return [start, end]
+
+
+class Position:
+    def __init__(self):
+        self.pieces = [[0] * 6, [0] * 6]  # Bitboard por cor e tipo de peça
+        self.occupied = [0, 0]  # Ocupação por cor
+        self.mailbox = [None] * 64  # (cor, tipo) de cada casa, para consultas rápidas
+        self.king_sq = [None, None]
+        self.turn = YELLOW
+        self.castling = ALL_CASTLING
+        self.en_passant = None  # Casa atravessada pelo último avanço duplo de peão
+        self.history = []  # Registros para unmake_move
+        self.hash = 0  # Hash de Zobrist, atualizado a cada jogada
+
+    @classmethod
+    def from_board(cls, board, turn='yellow', castling_rights=None, en_passant=None):
+        # Converte o tabuleiro em lista de listas do JogoXadrez
+        position = cls()
+        for row in range(8):
+            for col in range(8):
+                piece = board[row][col]
+                if piece:
+                    position.put_piece(square(row, col), COLORS.index(piece[0]), PIECE_TYPES.index(piece[1]))
+        position.turn = COLORS.index(turn)
+        if castling_rights is not None:
+            position.castling = ((YELLOW_SHORT if castling_rights['yellow']['short'] else 0) |
+                                 (YELLOW_LONG if castling_rights['yellow']['long'] else 0) |
+                                 (BLACK_SHORT if castling_rights['black']['short'] else 0) |
+                                 (BLACK_LONG if castling_rights['black']['long'] else 0))
+        position.en_passant = square(*en_passant) if en_passant else None
+        position.hash = position.compute_hash()
+        return position
+
+    @classmethod
+    def from_fen(cls, fen):
+        # Lê uma posição em notação FEN (as brancas do FEN são as amarelas do jogo)
+        fields = fen.split()
+        position = cls()
+        for row, line in enumerate(fields[0].split('/')):
+            col = 0
+            for char in line:
+                if char.isdigit():
+                    col += int(char)
+                else:
+                    color = YELLOW if char.isupper() else BLACK
+                    position.put_piece(square(row, col), color, FEN_PIECES.index(char.lower()))
+                    col += 1
+        position.turn = YELLOW if len(fields) < 2 or fields[1] == 'w' else BLACK
+        castling = fields[2] if len(fields) > 2 else '-'
+        position.castling = sum(bit for char, bit in zip('KQkq', (YELLOW_SHORT, YELLOW_LONG, BLACK_SHORT, BLACK_LONG))
+                                if char in castling)
+        ep = fields[3] if len(fields) > 3 else '-'
+        position.en_passant = parse_square(ep) if ep != '-' else None
+        position.hash = position.compute_hash()
+        return position
+
+    def to_fen(self, halfmove=0, fullmove=1):
+        # Os contadores de lances não fazem parte da posição: quem joga (JogoXadrez) os mantém
+        rows = []
+        for row in range(8):
+            line, empty = '', 0
+            for col in range(8):
+                piece = self.mailbox[square(row, col)]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    line += str(empty)
+                    empty = 0
+                char = FEN_PIECES[piece[1]]
+                line += char.upper() if piece[0] == YELLOW else char
+            rows.append(line + (str(empty) if empty else ''))
+        castling = ''.join(char for char, bit in zip('KQkq', (YELLOW_SHORT, YELLOW_LONG, BLACK_SHORT, BLACK_LONG))
+                           if self.castling & bit) or '-'
+        ep = square_name(self.en_passant) if self.en_passant is not None else '-'
+        return f"{'/'.join(rows)} {'wb'[self.turn]} {castling} {ep} {halfmove} {fullmove}"
+
+    def to_board(self):
+        board = [[None] * 8 for _ in range(8)]
+        for sq in range(64):
+            board[sq >> 3][sq & 7] = self.piece_at(sq)
+        return board
+
+    def castling_rights(self):
+        # Direitos de roque no formato de JogoXadrez.castling_rights
+        return {color: {'short': bool(self.castling & (YELLOW_SHORT << (2 * index))),
+                        'long': bool(self.castling & (YELLOW_LONG << (2 * index)))}
+                for index, color in enumerate(COLORS)}
+
+    def piece_at(self, sq):
+        # Peça no formato (cor, tipo) de JogoXadrez.board
+        piece = self.mailbox[sq]
+        return (COLORS[piece[0]], PIECE_TYPES[piece[1]]) if piece else None
+
+    def copy(self):
+        position = Position.__new__(Position)
+        position.pieces = [self.pieces[0][:], self.pieces[1][:]]
+        position.occupied = self.occupied[:]
+        position.mailbox = self.mailbox[:]
+        position.king_sq = self.king_sq[:]
+        position.turn = self.turn
+        position.castling = self.castling
+        position.en_passant = self.en_passant
+        position.history = self.history[:]
+        position.hash = self.hash
+        return position
+
+    def compute_hash(self):
+        # Hash de Zobrist calculado do zero (make_move o mantém de forma incremental)
+        h = ZOBRIST_CASTLING[self.castling]
+        for sq, piece in enumerate(self.mailbox):
+            if piece:
+                h ^= ZOBRIST_PIECES[piece[0]][piece[1]][sq]
+        if self.en_passant is not None:
+            h ^= ZOBRIST_EN_PASSANT[self.en_passant & 7]
+        if self.turn == BLACK:
+            h ^= ZOBRIST_TURN
+        return h
+
+    def put_piece(self, sq, color, piece_type):
+        bit = 1 << sq
+        self.pieces[color][piece_type] |= bit
+        self.occupied[color] |= bit
+        self.mailbox[sq] = (color, piece_type)
+        if piece_type == KING:
+            self.king_sq[color] = sq
+
+    def remove_piece(self, sq):
+        piece = self.mailbox[sq]
+        if piece:
+            bit = 1 << sq
+            self.pieces[piece[0]][piece[1]] ^= bit
+            self.occupied[piece[0]] ^= bit
+            self.mailbox[sq] = None
+        return piece
+
+    # ---- Ataques ----
+
+    def attacks_from(self, sq):
+        # Casas atacadas pela peça em sq (para peões, só as diagonais)
+        color, piece_type = self.mailbox[sq]
+        if piece_type == PAWN:
+            return PAWN_ATTACKS[color][sq]
+        if piece_type == KNIGHT:
+            return KNIGHT_ATTACKS[sq]
+        if piece_type == KING:
+            return KING_ATTACKS[sq]
+        occupied = self.occupied[0] | self.occupied[1]
+        if piece_type == BISHOP:
+            return bishop_attacks(sq, occupied)
+        if piece_type == ROOK:
+            return rook_attacks(sq, occupied)
+        return queen_attacks(sq, occupied)
+
+    def attack_map(self, color):
+        # Todas as casas atacadas por uma cor
+        pieces = self.pieces[color]
+        occupied = self.occupied[0] | self.occupied[1]
+        attacks = pawn_attack_map(pieces[PAWN], color)
+        for sq in iter_bits(pieces[KNIGHT]):
+            attacks |= KNIGHT_ATTACKS[sq]
+        for sq in iter_bits(pieces[BISHOP] | pieces[QUEEN]):
+            attacks |= _slide(BISHOP_RAYS[sq], occupied)
+        for sq in iter_bits(pieces[ROOK] | pieces[QUEEN]):
+            attacks |= _slide(ROOK_RAYS[sq], occupied)
+        if self.king_sq[color] is not None:
+            attacks |= KING_ATTACKS[self.king_sq[color]]
+        return attacks
+
+    def is_square_attacked(self, sq, by_color):
+        # Procura atacantes a partir da própria casa: diagonais de peão, saltos de
+        # cavalo e rei e o primeiro bloqueador de cada raio das peças deslizantes
+        pieces = self.pieces[by_color]
+        if PAWN_ATTACKS[by_color ^ 1][sq] & pieces[PAWN] or KNIGHT_ATTACKS[sq] & pieces[KNIGHT] \
+                or KING_ATTACKS[sq] & pieces[KING]:
+            return True
+        occupied = self.occupied[0] | self.occupied[1]
+        for sliders, rays in ((pieces[BISHOP] | pieces[QUEEN], BISHOP_RAYS[sq]),
+                              (pieces[ROOK] | pieces[QUEEN], ROOK_RAYS[sq])):
+            if not sliders:
+                continue
+            for ray, positive, _ in rays:
+                if ray & sliders:
+                    blockers = ray & occupied
+                    first = (blockers & -blockers).bit_length() - 1 if positive else blockers.bit_length() - 1
+                    if sliders >> first & 1:
+                        return True
+        return False
+
+    def is_in_check(self, color):
+        king = self.king_sq[color]
+        return king is not None and self.is_square_attacked(king, color ^ 1)
+
+    def attackers_to(self, sq, by_color, occupied):
+        # Peças de by_color que atacam sq com a ocupação dada (que pode não ser a atual)
+        pieces = self.pieces[by_color]
+        return ((PAWN_ATTACKS[by_color ^ 1][sq] & pieces[PAWN]) | (KNIGHT_ATTACKS[sq] & pieces[KNIGHT]) |
+                (KING_ATTACKS[sq] & pieces[KING]) |
+                (_slide(BISHOP_RAYS[sq], occupied) & (pieces[BISHOP] | pieces[QUEEN])) |
+                (_slide(ROOK_RAYS[sq], occupied) & (pieces[ROOK] | pieces[QUEEN])))
+
+    # ---- Geração de jogadas ----
+
+    def moves_from(self, sq, moves=None):
+        # Jogadas pseudo-legais da peça em sq (podem deixar o próprio rei em xeque)
+        if moves is None:
+            moves = []
+        color, piece_type = self.mailbox[sq]
+        own = self.occupied[color]
+        enemy = self.occupied[color ^ 1]
+        if piece_type == PAWN:
+            self._pawn_moves(sq, color, own | enemy, enemy, moves)
+            return moves
+        targets = self.attacks_from(sq) & ~own
+        for end in iter_bits(targets):
+            moves.append(sq | (end << 6))
+        if piece_type == KING:
+            self._castling_moves(color, own | enemy, moves)
+        return moves
+
+    def _pawn_moves(self, sq, color, occupied, enemy, moves):
+        step = -8 if color == YELLOW else 8
+        last_row = 0 if color == YELLOW else 7
+        end = sq + step
+        # Avanço simples e duplo
+        if not occupied >> end & 1:
+            self._add_pawn_move(sq, end, last_row, moves)
+            if (sq >> 3) == (6 if color == YELLOW else 1) and not occupied >> (end + step) & 1:
+                moves.append(encode_move(sq, end + step, DOUBLE_PUSH))
+        # Capturas diagonais
+        for end in iter_bits(PAWN_ATTACKS[color][sq] & enemy):
+            self._add_pawn_move(sq, end, last_row, moves)
+        # En passant (a casa só vale para quem tem a vez)
+        if self.en_passant is not None and color == self.turn and PAWN_ATTACKS[color][sq] >> self.en_passant & 1:
+            moves.append(encode_move(sq, self.en_passant, EN_PASSANT))
+
+    @staticmethod
+    def _add_pawn_move(start, end, last_row, moves):
+        if end >> 3 == last_row:
+            for promo in PROMOTION_PIECES:
+                moves.append(encode_move(start, end, PROMOTION, promo))
+        else:
+            moves.append(start | (end << 6))
+
+    def _castling_moves(self, color, occupied, moves):
+        rights = self.castling
+        if not rights & (3 << (2 * color)):
+            return
+        rooks = self.pieces[color][ROOK]
+        for right, king_from, king_to, empty, crossed, rook_from, _ in CASTLING_MOVES[color]:
+            if rights & right and not occupied & empty and rooks >> rook_from & 1 \
+                    and self.king_sq[color] == king_from:
+                # Não pode rocar em xeque nem atravessar casa atacada
+                if not self.is_square_attacked(king_from, color ^ 1) \
+                        and not self.is_square_attacked(crossed, color ^ 1):
+                    moves.append(encode_move(king_from, king_to, CASTLE))
+
+    def pseudo_legal_moves(self, color=None):
+        # Todas as jogadas pseudo-legais de uma cor, geradas por tipo de peça
+        color = self.turn if color is None else color
+        pieces = self.pieces[color]
+        own = self.occupied[color]
+        enemy = self.occupied[color ^ 1]
+        occupied = own | enemy
+        moves = []
+        append = moves.append
+        self._bulk_pawn_moves(color, pieces[PAWN], occupied, enemy, moves)
+        for piece_type, table in ((KNIGHT, KNIGHT_ATTACKS), (KING, KING_ATTACKS)):
+            bb = pieces[piece_type]
+            while bb:
+                low = bb & -bb
+                start = low.bit_length() - 1
+                bb ^= low
+                targets = table[start] & ~own
+                while targets:
+                    low = targets & -targets
+                    append(start | ((low.bit_length() - 1) << 6))
+                    targets ^= low
+        for piece_type, rays in ((BISHOP, (BISHOP_RAYS,)), (ROOK, (ROOK_RAYS,)), (QUEEN, (BISHOP_RAYS, ROOK_RAYS))):
+            bb = pieces[piece_type]
+            while bb:
+                low = bb & -bb
+                start = low.bit_length() - 1
+                bb ^= low
+                targets = 0
+                for ray_table in rays:
+                    targets |= _slide(ray_table[start], occupied)
+                targets &= ~own
+                while targets:
+                    low = targets & -targets
+                    append(start | ((low.bit_length() - 1) << 6))
+                    targets ^= low
+        if self.king_sq[color] is not None:
+            self._castling_moves(color, occupied, moves)
+        return moves
+
+    def _bulk_pawn_moves(self, color, pawns, occupied, enemy, moves):
+        # Avanços e capturas de todos os peões com deslocamentos de bits
+        empty = ~occupied & FULL
+        if color == YELLOW:
+            step, last_row = -8, 0
+            single = (pawns >> 8) & empty
+            double = ((single & (0xFF << 40)) >> 8) & empty
+            left = ((pawns & ~FILE_A) >> 9) & enemy
+            right = ((pawns & ~FILE_H) >> 7) & enemy
+            left_delta, right_delta = -9, -7
+        else:
+            step, last_row = 8, 7
+            single = (pawns << 8) & empty
+            double = ((single & (0xFF << 16)) << 8) & empty
+            left = ((pawns & ~FILE_A) << 7) & enemy
+            right = ((pawns & ~FILE_H) << 9) & enemy
+            left_delta, right_delta = 7, 9
+        for targets, delta in ((single, step), (left, left_delta), (right, right_delta)):
+            while targets:
+                low = targets & -targets
+                end = low.bit_length() - 1
+                targets ^= low
+                self._add_pawn_move(end - delta, end, last_row, moves)
+        while double:
+            low = double & -double
+            end = low.bit_length() - 1
+            double ^= low
+            moves.append(encode_move(end - 2 * step, end, DOUBLE_PUSH))
+        if self.en_passant is not None and color == self.turn:
+            for start in iter_bits(PAWN_ATTACKS[color ^ 1][self.en_passant] & pawns):
+                moves.append(encode_move(start, self.en_passant, EN_PASSANT))
+
+    def make_move(self, move):
+        # Executa a jogada guardando só o necessário para desfazê-la: peça capturada,
+        # direitos de roque, casa de en passant e hash anteriores. A posição do rei é
+        # atualizada junto com a peça e volta para a casa de origem em unmake_move.
+        start, end, flag = move & 63, (move >> 6) & 63, (move >> 12) & 7
+        mailbox = self.mailbox
+        piece = mailbox[start]
+        color, piece_type = piece
+        captured_sq = end + (8 if color == YELLOW else -8) if flag == EN_PASSANT else end
+        captured = mailbox[captured_sq]
+        self.history.append((move, captured, self.castling, self.en_passant, self.hash))
+
+        h = self.hash ^ ZOBRIST_TURN ^ ZOBRIST_CASTLING[self.castling]
+        if self.en_passant is not None:
+            h ^= ZOBRIST_EN_PASSANT[self.en_passant & 7]
+        if captured:
+            h ^= ZOBRIST_PIECES[captured[0]][captured[1]][captured_sq]
+            bit = 1 << captured_sq
+            self.pieces[captured[0]][captured[1]] ^= bit
+            self.occupied[captured[0]] ^= bit
+            mailbox[captured_sq] = None
+
+        pieces = self.pieces[color]
+        start_bit, end_bit = 1 << start, 1 << end
+        pieces[piece_type] ^= start_bit
+        self.occupied[color] ^= start_bit | end_bit
+        mailbox[start] = None
+        zobrist = ZOBRIST_PIECES[color]
+        h ^= zobrist[piece_type][start]
+        if flag == PROMOTION:
+            piece = (color, move >> 15)
+            pieces[move >> 15] |= end_bit
+            h ^= zobrist[move >> 15][end]
+        else:
+            pieces[piece_type] |= end_bit
+            h ^= zobrist[piece_type][end]
+        mailbox[end] = piece
+
+        if piece_type == KING:
+            self.king_sq[color] = end
+            if flag == CASTLE:
+                rook_from, rook_to = CASTLING_ROOKS[end]
+                self._move_rook(color, rook_from, rook_to)
+                h ^= zobrist[ROOK][rook_from] ^ zobrist[ROOK][rook_to]
+
+        self.castling &= CASTLING_MASK[start] & CASTLING_MASK[end]
+        h ^= ZOBRIST_CASTLING[self.castling]
+        if flag == DOUBLE_PUSH:
+            self.en_passant = (start + end) >> 1
+            h ^= ZOBRIST_EN_PASSANT[end & 7]
+        else:
+            self.en_passant = None
+        self.hash = h
+        self.turn = color ^ 1
+
+    def unmake_move(self):
+        move, captured, castling, en_passant, self.hash = self.history.pop()
+        start, end, flag = move & 63, (move >> 6) & 63, (move >> 12) & 7
+        mailbox = self.mailbox
+        color = mailbox[end][0]
+        piece_type = PAWN if flag == PROMOTION else mailbox[end][1]
+
+        pieces = self.pieces[color]
+        start_bit, end_bit = 1 << start, 1 << end
+        pieces[mailbox[end][1]] ^= end_bit
+        pieces[piece_type] |= start_bit
+        self.occupied[color] ^= start_bit | end_bit
+        mailbox[end] = None
+        mailbox[start] = (color, piece_type)
+
+        if piece_type == KING:
+            self.king_sq[color] = start
+            if flag == CASTLE:
+                rook_from, rook_to = CASTLING_ROOKS[end]
+                self._move_rook(color, rook_to, rook_from)
+
+        if captured:
+            captured_sq = end + (8 if color == YELLOW else -8) if flag == EN_PASSANT else end
+            bit = 1 << captured_sq
+            self.pieces[captured[0]][captured[1]] |= bit
+            self.occupied[captured[0]] |= bit
+            mailbox[captured_sq] = captured
+
+        self.castling = castling
+        self.en_passant = en_passant
+        self.turn = color
+
+    def _move_rook(self, color, rook_from, rook_to):
+        # Torre do roque
+        bits = (1 << rook_from) | (1 << rook_to)
+        self.pieces[color][ROOK] ^= bits
+        self.occupied[color] ^= bits
+        self.mailbox[rook_to] = self.mailbox[rook_from]
+        self.mailbox[rook_from] = None
+
+    def find_move(self, start, end, promo=QUEEN):
+        # Jogada pseudo-legal de start para end (promoções escolhem a peça pedida)
+        for move in self.moves_from(start):
+            if (move >> 6) & 63 == end and (move >> 12 & 7 != PROMOTION or move >> 15 == promo):
+                return move
+        return None
+
+    def is_legal(self, move):
+        # Teste de uma jogada avulsa fazendo e desfazendo; listas inteiras saem de legal_moves
+        color = self.mailbox[move & 63][0]
+        self.make_move(move)
+        legal = not self.is_in_check(color)
+        self.unmake_move()
+        return legal
+
+    def legal_moves(self, color=None):
+        return list(self.iter_legal_moves(color))
+
+    def has_legal_moves(self, color=None):
+        for _ in self.iter_legal_moves(color):
+            return True
+        return False
+
+    def iter_legal_moves(self, color=None):
+        # Só jogadas legais, sem fazer e desfazer cada uma: xeques e cravadas são
+        # calculados uma vez e cada jogada pseudo-legal é filtrada com testes de bits.
+        # - Xeque duplo: só o rei anda.
+        # - Xeque simples: as outras peças precisam capturar o atacante ou bloquear.
+        # - Peça cravada: só anda entre o rei e a peça que a crava (capturando-a inclusive).
+        # - Rei: a casa de destino não pode estar atacada com o rei fora da casa de origem
+        #   (senão ele "se esconde" atrás de si mesmo num raio); no roque, nem a de destino.
+        # - En passant: refaz o teste com os dois peões fora do tabuleiro, o que pega o
+        #   xeque descoberto na horizontal.
+        color = self.turn if color is None else color
+        king = self.king_sq[color]
+        if king is None:  # Posições de teste sem rei
+            yield from self.pseudo_legal_moves(color)
+            return
+        enemy_color = color ^ 1
+        own = self.occupied[color]
+        enemy = self.occupied[enemy_color]
+        occupied = own | enemy
+        them = self.pieces[enemy_color]
+
+        checkers = self.attackers_to(king, enemy_color, occupied)
+        double_check = checkers & (checkers - 1)
+        if checkers:
+            target_mask = checkers | BETWEEN[king][checkers.bit_length() - 1]
+        else:
+            target_mask = FULL
+
+        # Cravadas: peças deslizantes inimigas vistas do rei "através" das próprias peças
+        pinned = 0
+        pin_masks = {}
+        snipers = (_slide(ROOK_RAYS[king], enemy) & (them[ROOK] | them[QUEEN])) | \
+                  (_slide(BISHOP_RAYS[king], enemy) & (them[BISHOP] | them[QUEEN]))
+        while snipers:
+            low = snipers & -snipers
+            snipers ^= low
+            sniper = low.bit_length() - 1
+            between = BETWEEN[king][sniper] & occupied
+            if between and not between & (between - 1):
+                pinned |= between
+                pin_masks[between.bit_length() - 1] = BETWEEN[king][sniper] | low
+
+        without_king = occupied ^ (1 << king)
+        attackers_to = self.attackers_to
+        for move in self.pseudo_legal_moves(color):
+            start = move & 63
+            end = (move >> 6) & 63
+            if start == king:
+                if (move >> 12) & 7 == CASTLE and checkers:
+                    continue
+                if not attackers_to(end, enemy_color, without_king):
+                    yield move
+                continue
+            if double_check:
+                continue
+            if (move >> 12) & 7 == EN_PASSANT:
+                captured = end + (8 if color == YELLOW else -8)
+                after = (occupied ^ (1 << start) ^ (1 << captured)) | (1 << end)
+                if not attackers_to(king, enemy_color, after) & ~(1 << captured):
+                    yield move
+                continue
+            if not target_mask >> end & 1:
+                continue
+            if pinned >> start & 1 and not pin_masks[start] >> end & 1:
+                continue
+            yield move
+
+    # ---- Interface em (linha, coluna), igual à do JogoXadrez ----
+
+    def get_valid_moves(self, row, col, moves=None):
+        # moves: jogadas legais já geradas para a cor da peça (por exemplo, as do MoveCache)
+        start = square(row, col)
+        targets = []
+        if moves is None:
+            moves = self.legal_moves(self.mailbox[start][0])
+        for move in moves:
+            if move & 63 != start:
+                continue
+            target = row_col(move_end(move))
+            if target not in targets:  # Promoções geram o mesmo destino quatro vezes
+                targets.append(target)
+        return targets
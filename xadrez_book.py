@@ -0,0 +1,174 @@
+# Livro de aberturas e finais em arquivo binário ordenado
+#
+# O arquivo é um cabeçalho seguido de registros de 16 bytes (hash de Zobrist da
+# posição, jogada, peso ou pontuação) ordenados pelo hash. Ele é aberto com mmap e
+# consultado por busca binária: nada é carregado ao abrir, e vários processos que
+# abrem o mesmo arquivo dividem as mesmas páginas do cache do sistema.
+#
+# O hash é o de Position (peças, vez, roque e en passant), o mesmo que o motor mantém
+# a cada jogada, então consultar o livro não custa nada além da busca binária.
+#
+# Uso:
+#   python xadrez_book.py abertura partidas.pgn livro.bin [--plies 20]
+#   python xadrez_book.py finais finais.fen finais.bin [--depth 6]   (resolve cada posição com o motor)
+#   python xadrez_book.py consulta livro.bin [--fen FEN]
+
+import argparse
+import mmap
+import random
+import struct
+import sys
+import time
+
+from xadrez_bitboard import START_FEN, Position, move_name
+from xadrez_pgn import iter_games, replay
+
+MAGIC = b'XADREZBK'
+HEADER = struct.Struct('<8sII')  # Assinatura, tipo, número de registros
+RECORD = struct.Struct('<QIi')  # Hash, jogada, peso (abertura) ou pontuação (finais)
+KEY = struct.Struct('<Q')
+OPENING, ENDGAME = 0, 1
+
+RESULT_WEIGHTS = {'1-0': (2, 0), '0-1': (0, 2), '1/2-1/2': (1, 1), '*': (1, 1)}  # (amarelas, pretas)
+
+
+def write_book(path, entries, kind):
+    # entries: (hash, jogada, valor); gravados ordenados por hash e, no mesmo hash, pelo maior valor
+    entries = sorted(entries, key=lambda entry: (entry[0], -entry[2]))
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, kind, len(entries)))
+        for key, move, value in entries:
+            file.write(RECORD.pack(key, move, value))
+    return len(entries)
+
+
+class Book:
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.kind, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} não é um livro do xadrez")
+
+    def entries(self, key):
+        # (jogada, valor) gravados para o hash, do maior valor para o menor
+        data = self.data
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) >> 1
+            if KEY.unpack_from(data, HEADER.size + middle * RECORD.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        offset = HEADER.size + low * RECORD.size
+        while low < self.count:
+            entry_key, move, value = RECORD.unpack_from(data, offset)
+            if entry_key != key:
+                break
+            found.append((move, value))
+            low += 1
+            offset += RECORD.size
+        return found
+
+    def probe(self, position, rng=random):
+        # (jogada, valor) do livro para a posição ou None. Na abertura sorteia pelo peso; nos
+        # finais fica com a melhor pontuação. Cada jogada é conferida só na peça de origem
+        # (colisão de hash ou livro de outra versão não viram jogada ilegal)
+        found = [(move, value) for move, value in self.entries(position.hash) if self._is_legal(position, move)]
+        if not found:
+            return None
+        total = sum(max(value, 0) for _, value in found)
+        if self.kind == ENDGAME or total <= 0:
+            return found[0]
+        pick = rng.random() * total
+        for move, value in found:
+            pick -= max(value, 0)
+            if pick < 0:
+                return move, value
+        return found[-1]
+
+    @staticmethod
+    def _is_legal(position, move):
+        piece = position.mailbox[move & 63]
+        return (piece is not None and piece[0] == position.turn and move in position.moves_from(move & 63)
+                and position.is_legal(move))
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+def opening_entries(pgn_path, plies):
+    # Conta, nas primeiras jogadas de cada partida, quantas vezes cada jogada foi feita em
+    # cada posição, com peso pelo resultado para quem jogou (vitória 2, empate 1, derrota 0)
+    counts = {}
+    for game in iter_games(pgn_path):
+        weights = RESULT_WEIGHTS.get(game.result, (1, 1))
+        try:
+            for ply, (position, move) in enumerate(replay(game)):
+                if ply >= plies:
+                    break
+                pair = (position.hash, move)
+                counts[pair] = counts.get(pair, 0) + weights[position.turn]
+        except ValueError:
+            continue  # Partida com jogada inválida: fica o que foi lido até ela
+    return [(key, move, weight) for (key, move), weight in counts.items() if weight > 0]
+
+
+def endgame_entries(fens, depth, workers=None):
+    # Cada posição resolvida pelo motor em vários processos. xadrez_parallel importa este
+    # módulo (os processos abrem os livros), por isso a importação fica aqui
+    from xadrez_parallel import analyse_positions
+
+    for result in analyse_positions(fens, depth, workers=workers):
+        if result.move is None:
+            continue
+        position = Position.from_fen(result.fen)
+        move = next(move for move in position.legal_moves() if move_name(move) == result.move)
+        yield position.hash, move, result.score
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Livro de aberturas e de finais com mmap")
+    commands = parser.add_subparsers(dest='command', required=True)
+    opening = commands.add_parser('abertura', help="monta o livro a partir de um PGN")
+    opening.add_argument('pgn')
+    opening.add_argument('output')
+    opening.add_argument('--plies', type=int, default=20, help="meio-lances de cada partida que entram no livro")
+    endgame = commands.add_parser('finais', help="resolve posições com o motor e grava a melhor jogada")
+    endgame.add_argument('fens', help="arquivo com uma posição FEN por linha")
+    endgame.add_argument('output')
+    endgame.add_argument('--depth', type=int, default=6)
+    endgame.add_argument('--workers', type=int, default=None)
+    query = commands.add_parser('consulta', help="consulta uma posição e mede o tempo da busca")
+    query.add_argument('book')
+    query.add_argument('--fen', default=START_FEN)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'abertura':
+        count = write_book(args.output, opening_entries(args.pgn, args.plies), OPENING)
+    elif args.command == 'finais':
+        from xadrez_parallel import read_fens
+
+        count = write_book(args.output, endgame_entries(read_fens(args.fens), args.depth, args.workers), ENDGAME)
+    else:
+        book = Book(args.book)
+        position = Position.from_fen(args.fen)
+        found = book.entries(position.hash)
+        if not found:
+            sys.exit("Posição fora do livro")
+        for move, value in found:
+            print(f"{move_name(move):6} {value:>7}")
+        repeat = 100000
+        start = time.perf_counter()
+        for _ in range(repeat):
+            book.entries(position.hash)
+        print(f"{(time.perf_counter() - start) / repeat * 1e6:.1f} µs por consulta ({book.count} registros)")
+        return
+    print(f"{count} registros gravados em {args.output} em {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
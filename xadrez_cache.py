@@ -0,0 +1,59 @@
+# Cache de jogadas legais por posição
+#
+# A mesma posição é consultada várias vezes seguidas: o clique pede as jogadas da peça,
+# check_checkmate pergunta se ainda há jogadas legais e o motor gera a lista da raiz.
+# MoveCache guarda a lista completa de jogadas legais pelo hash de Zobrist da posição
+# (que make_move atualiza a cada jogada) e descarta as menos usadas quando passa do
+# orçamento de memória.
+
+import threading
+from collections import OrderedDict
+
+# Estimativa de bytes por entrada: chave, tupla, nó do dicionário e cada inteiro da jogada
+ENTRY_BYTES = 200
+MOVE_BYTES = 36
+
+
+class MoveCache:
+    def __init__(self, memory_budget=8 << 20):
+        self.memory_budget = memory_budget
+        self.entries = OrderedDict()  # hash -> tupla de jogadas, da menos para a mais usada
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()  # O motor consulta da thread dele
+
+    def legal_moves(self, position):
+        # Tupla (não deve ser alterada) com as jogadas legais de quem joga na posição
+        key = position.hash
+        with self.lock:
+            moves = self.entries.get(key)
+            if moves is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return moves
+            self.misses += 1
+        moves = tuple(position.legal_moves())
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = moves
+                self.bytes += ENTRY_BYTES + MOVE_BYTES * len(moves)
+                while self.bytes > self.memory_budget and len(self.entries) > 1:
+                    _, evicted = self.entries.popitem(last=False)
+                    self.bytes -= ENTRY_BYTES + MOVE_BYTES * len(evicted)
+                    self.evictions += 1
+        return moves
+
+    def has_legal_moves(self, position):
+        return bool(self.legal_moves(position))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'entries': len(self.entries), 'bytes': self.bytes, 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'hit_rate': self.hits / total if total else 0.0}
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
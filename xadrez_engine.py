@@ -0,0 +1,330 @@
+# Motor de busca para jogar contra o computador
+#
+# Busca alfa-beta com aprofundamento iterativo sobre xadrez_bitboard.Position:
+# ordenação de jogadas (jogada da tabela, MVV-LVA e jogadas "killer"), tabela de
+# transposição com hash de Zobrist e limite de tempo ou de nós.
+
+import time
+
+from xadrez_bitboard import BLACK, EN_PASSANT, PAWN, PROMOTION, YELLOW, iter_bits
+from xadrez_book import ENDGAME
+
+PIECE_VALUES = (100, 320, 330, 500, 900, 0)
+
+# Tabelas de posição do ponto de vista das amarelas (linha 0 = lado das pretas);
+# para as pretas a casa é espelhada com sq ^ 56
+PIECE_SQUARE_TABLES = (
+    (0, 0, 0, 0, 0, 0, 0, 0,
+     50, 50, 50, 50, 50, 50, 50, 50,
+     10, 10, 20, 30, 30, 20, 10, 10,
+     5, 5, 10, 25, 25, 10, 5, 5,
+     0, 0, 0, 20, 20, 0, 0, 0,
+     5, -5, -10, 0, 0, -10, -5, 5,
+     5, 10, 10, -20, -20, 10, 10, 5,
+     0, 0, 0, 0, 0, 0, 0, 0),
+    (-50, -40, -30, -30, -30, -30, -40, -50,
+     -40, -20, 0, 0, 0, 0, -20, -40,
+     -30, 0, 10, 15, 15, 10, 0, -30,
+     -30, 5, 15, 20, 20, 15, 5, -30,
+     -30, 0, 15, 20, 20, 15, 0, -30,
+     -30, 5, 10, 15, 15, 10, 5, -30,
+     -40, -20, 0, 5, 5, 0, -20, -40,
+     -50, -40, -30, -30, -30, -30, -40, -50),
+    (-20, -10, -10, -10, -10, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 10, 10, 5, 0, -10,
+     -10, 5, 5, 10, 10, 5, 5, -10,
+     -10, 0, 10, 10, 10, 10, 0, -10,
+     -10, 10, 10, 10, 10, 10, 10, -10,
+     -10, 5, 0, 0, 0, 0, 5, -10,
+     -20, -10, -10, -10, -10, -10, -10, -20),
+    (0, 0, 0, 0, 0, 0, 0, 0,
+     5, 10, 10, 10, 10, 10, 10, 5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     0, 0, 0, 5, 5, 0, 0, 0),
+    (-20, -10, -10, -5, -5, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 5, 5, 5, 0, -10,
+     -5, 0, 5, 5, 5, 5, 0, -5,
+     0, 0, 5, 5, 5, 5, 0, -5,
+     -10, 5, 5, 5, 5, 5, 0, -10,
+     -10, 0, 5, 0, 0, 0, 0, -10,
+     -20, -10, -10, -5, -5, -10, -10, -20),
+    (-30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -20, -30, -30, -40, -40, -30, -30, -20,
+     -10, -20, -20, -20, -20, -20, -20, -10,
+     20, 20, 0, 0, 0, 0, 20, 20,
+     20, 30, 10, 0, 0, 10, 30, 20),
+)
+
+# Valor (material + posição) de cada peça em cada casa, por cor
+SQUARE_VALUES = [[[PIECE_VALUES[piece_type] + PIECE_SQUARE_TABLES[piece_type][sq if color == YELLOW else sq ^ 56]
+                   for sq in range(64)] for piece_type in range(6)] for color in (YELLOW, BLACK)]
+
+INFINITY = 1000000
+MATE = 100000
+MAX_PLY = 64
+
+# Tipos de entrada da tabela de transposição
+EXACT, LOWER, UPPER = range(3)
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class TranspositionTable:
+    def __init__(self, size=1 << 18):
+        # Tamanho fixo (potência de 2): a entrada de uma posição fica em hash & mask
+        size = 1 << (max(size, 1) - 1).bit_length()
+        self.entries = [None] * size
+        self.mask = size - 1
+        self.generation = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def probe(self, key):
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        # Substituição: a mesma posição, entradas de buscas anteriores ou com
+        # profundidade menor dão lugar à nova; as mais profundas da busca atual ficam
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is None or entry[0] == key or entry[5] != self.generation or depth >= entry[1]:
+            self.entries[index] = (key, depth, score, flag, move, self.generation)
+
+    def clear(self):
+        self.entries = [None] * len(self.entries)
+
+
+class SearchResult:
+    def __init__(self):
+        self.move = None
+        self.score = 0
+        self.depth = 0
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.from_book = False
+
+
+def evaluate(position):
+    # Avaliação do ponto de vista de quem joga
+    score = 0
+    for color, sign in ((YELLOW, 1), (BLACK, -1)):
+        values = SQUARE_VALUES[color]
+        pieces = position.pieces[color]
+        for piece_type in range(6):
+            table = values[piece_type]
+            for sq in iter_bits(pieces[piece_type]):
+                score += sign * table[sq]
+    return score if position.turn == YELLOW else -score
+
+
+def _score_to_tt(score, ply):
+    # Pontuações de mate são guardadas relativas à posição, não à raiz
+    if score > MATE - MAX_PLY:
+        return score + ply
+    if score < -MATE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score, ply):
+    if score > MATE - MAX_PLY:
+        return score - ply
+    if score < -MATE + MAX_PLY:
+        return score + ply
+    return score
+
+
+class Engine:
+    def __init__(self, time_limit=1.0, node_limit=None, max_depth=MAX_PLY - 1, tt_size=1 << 18, books=(),
+                 move_cache=None):
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_depth = max_depth
+        self.tt = TranspositionTable(tt_size)
+        self.position = None
+        self.nodes = 0
+        self.deadline = None
+        self.stop_nodes = None
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self.root_move = None
+        self.books = list(books)  # xadrez_book.Book consultados antes de buscar
+        self.move_cache = move_cache  # xadrez_cache.MoveCache para as jogadas da raiz (opcional)
+
+    def search(self, position, time_limit=None, node_limit=None, max_depth=None):
+        # Aprofundamento iterativo: cada iteração completa atualiza o resultado; a que
+        # estoura o orçamento é descartada
+        time_limit = self.time_limit if time_limit is None else time_limit
+        node_limit = self.node_limit if node_limit is None else node_limit
+        max_depth = self.max_depth if max_depth is None else max_depth
+
+        self.position = position.copy()
+        self.position.history = []
+        self.nodes = 0
+        start = time.perf_counter()
+        self.deadline = start + time_limit if time_limit else None
+        self.stop_nodes = node_limit
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self.tt.new_search()
+
+        result = SearchResult()
+        for book in self.books:
+            found = book.probe(self.position)
+            if found is not None:
+                result.move = found[0]
+                result.score = found[1] if book.kind == ENDGAME else 0
+                result.from_book = True
+                result.elapsed = time.perf_counter() - start
+                return result
+        if self.move_cache is not None:
+            legal = self.move_cache.legal_moves(self.position)
+        else:
+            legal = self.position.legal_moves()
+        if legal:
+            result.move = legal[0]
+        for depth in range(1, max_depth + 1):
+            self.root_move = None
+            try:
+                score = self._search(depth, -INFINITY, INFINITY, 0)
+            except SearchTimeout:
+                break
+            if self.root_move is not None:
+                result.move = self.root_move
+            result.score = score
+            result.depth = depth
+            if abs(score) > MATE - MAX_PLY or len(legal) <= 1:
+                break
+            # Se metade do tempo já passou, a próxima iteração não terminaria
+            if self.deadline is not None and time.perf_counter() - start > time_limit / 2:
+                break
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def _check_budget(self):
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+        if self.stop_nodes is not None and self.nodes >= self.stop_nodes:
+            raise SearchTimeout
+
+    def _order(self, moves, tt_move, ply):
+        # Jogada da tabela primeiro, depois capturas por MVV-LVA (vítima mais valiosa,
+        # atacante menos valioso), promoções, killers e o resto
+        mailbox = self.position.mailbox
+        killers = self.killers[ply]
+        scored = []
+        for move in moves:
+            if move == tt_move:
+                key = 10000000
+            else:
+                victim = mailbox[(move >> 6) & 63]
+                flag = (move >> 12) & 7
+                if victim:
+                    key = 1000000 + 10 * PIECE_VALUES[victim[1]] - PIECE_VALUES[mailbox[move & 63][1]]
+                elif flag == EN_PASSANT:
+                    key = 1000000 + 9 * PIECE_VALUES[PAWN]
+                elif flag == PROMOTION:
+                    key = 900000 + PIECE_VALUES[move >> 15]
+                elif move == killers[0]:
+                    key = 800000
+                elif move == killers[1]:
+                    key = 700000
+                else:
+                    key = 0
+            scored.append((key, move))
+        scored.sort(reverse=True)
+        return [move for _, move in scored]
+
+    def _search(self, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & 1023:
+            self._check_budget()
+        position = self.position
+        color = position.turn
+        in_check = position.is_in_check(color)
+        if in_check and ply < MAX_PLY - 1:
+            depth += 1  # Extensão de xeque
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self._quiescence(alpha, beta, ply)
+
+        key = position.hash
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            tt_move = entry[4]
+            if ply > 0 and entry[1] >= depth:
+                score = _score_from_tt(entry[2], ply)
+                if entry[3] == EXACT or (entry[3] == LOWER and score >= beta) or \
+                        (entry[3] == UPPER and score <= alpha):
+                    return score
+
+        original_alpha = alpha
+        best_score, best_move = -INFINITY, None
+        for move in self._order(position.legal_moves(), tt_move, ply):
+            position.make_move(move)
+            score = -self._search(depth - 1, -beta, -alpha, ply + 1)
+            position.unmake_move()
+            if score > best_score:
+                best_score, best_move = score, move
+                if ply == 0:
+                    self.root_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        quiet = not position.mailbox[(move >> 6) & 63] and (move >> 12) & 7 not in (EN_PASSANT,
+                                                                                                  PROMOTION)
+                        if quiet and self.killers[ply][0] != move:
+                            self.killers[ply][1] = self.killers[ply][0]
+                            self.killers[ply][0] = move
+                        break
+
+        if best_move is None:
+            return -MATE + ply if in_check else 0  # Xeque-mate ou afogamento
+
+        flag = UPPER if best_score <= original_alpha else LOWER if best_score >= beta else EXACT
+        self.tt.store(key, depth, _score_to_tt(best_score, ply), flag, best_move)
+        return best_score
+
+    def _quiescence(self, alpha, beta, ply):
+        # Só capturas e promoções, para não avaliar no meio de uma troca
+        self.nodes += 1
+        if not self.nodes & 1023:
+            self._check_budget()
+        position = self.position
+        stand_pat = evaluate(position)
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        color = position.turn
+        mailbox = position.mailbox
+        tactical = [move for move in position.pseudo_legal_moves()
+                    if mailbox[(move >> 6) & 63] or (move >> 12) & 7 in (EN_PASSANT, PROMOTION)]
+        for move in self._order(tactical, None, ply):
+            position.make_move(move)
+            if position.is_in_check(color):
+                position.unmake_move()
+                continue
+            score = -self._quiescence(-beta, -alpha, ply + 1)
+            position.unmake_move()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
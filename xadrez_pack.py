@@ -0,0 +1,165 @@
+# Posições em formato binário de tamanho fixo
+#
+# Cada posição ocupa PACKED_SIZE bytes: 32 bytes com uma casa por meio byte (0 vazia,
+# 1-6 peça amarela, 9-14 peça preta), vez e roque num byte, casa de en passant e os
+# contadores de lances. Com tamanho fixo, a posição i de um arquivo está em
+# i * PACKED_SIZE: o arquivo é aberto com mmap e lido sem carregar tudo nem passar
+# pelo texto FEN.
+#
+# Uso:
+#   python xadrez_pack.py posicoes.fen posicoes.bin     (converte; .pgn grava cada posição das partidas)
+#   python xadrez_pack.py --bench posicoes.fen posicoes.bin
+
+import argparse
+import mmap
+import struct
+import time
+
+from xadrez_bitboard import (BLACK, KING, YELLOW, ZOBRIST_CASTLING, ZOBRIST_EN_PASSANT, ZOBRIST_PIECES, ZOBRIST_TURN,
+                             Position)
+from xadrez_pgn import fen_counters, iter_games, replay
+
+PACKED = struct.Struct('<32sBBHH2x')
+PACKED_SIZE = PACKED.size  # 40 bytes
+NO_EN_PASSANT = 255
+
+# Meio byte de cada (cor, tipo) e o inverso
+NIBBLES = {(color, piece_type): (color << 3) | (piece_type + 1) for color in (YELLOW, BLACK) for piece_type in range(6)}
+PIECES = [None] * 16
+for _piece, _nibble in NIBBLES.items():
+    PIECES[_nibble] = _piece
+# Peças de cada valor de byte (duas casas): tuplas (0 ou 1, (cor, tipo))
+BYTE_PIECES = [tuple((half, PIECES[(byte >> (4 * half)) & 15]) for half in (0, 1) if PIECES[(byte >> (4 * half)) & 15])
+               for byte in range(256)]
+
+
+def pack_position(position, halfmove=0, fullmove=1):
+    mailbox = position.mailbox
+    board = bytearray(32)
+    for sq in range(0, 64, 2):
+        low, high = mailbox[sq], mailbox[sq + 1]
+        board[sq >> 1] = (NIBBLES[low] if low else 0) | ((NIBBLES[high] if high else 0) << 4)
+    ep = NO_EN_PASSANT if position.en_passant is None else position.en_passant
+    return PACKED.pack(bytes(board), position.turn | (position.castling << 1), ep, min(halfmove, 65535),
+                       min(fullmove, 65535))
+
+
+def unpack_position(data, offset=0):
+    # Devolve (posição, meio-lances, número do lance) do registro em data[offset:]. Monta
+    # bitboards, mailbox e hash direto, sem put_piece nem compute_hash (é o laço quente
+    # de quem lê milhões de posições)
+    board, flags, ep, halfmove, fullmove = PACKED.unpack_from(data, offset)
+    position = Position()
+    pieces, occupied, mailbox = position.pieces, position.occupied, position.mailbox
+    turn, castling = flags & 1, flags >> 1
+    en_passant = None if ep == NO_EN_PASSANT else ep
+    h = ZOBRIST_CASTLING[castling]
+    for index, byte in enumerate(board):
+        for sq, piece in BYTE_PIECES[byte]:
+            sq += index << 1
+            color, piece_type = piece
+            bit = 1 << sq
+            pieces[color][piece_type] |= bit
+            occupied[color] |= bit
+            mailbox[sq] = piece
+            h ^= ZOBRIST_PIECES[color][piece_type][sq]
+    king = pieces[YELLOW][KING]
+    position.king_sq[YELLOW] = king.bit_length() - 1 if king else None
+    king = pieces[BLACK][KING]
+    position.king_sq[BLACK] = king.bit_length() - 1 if king else None
+    if en_passant is not None:
+        h ^= ZOBRIST_EN_PASSANT[en_passant & 7]
+    if turn == BLACK:
+        h ^= ZOBRIST_TURN
+    position.turn, position.castling, position.en_passant, position.hash = turn, castling, en_passant, h
+    return position, halfmove, fullmove
+
+
+def write_positions(file, positions):
+    # positions: posições ou tuplas (posição, meio-lances, número do lance)
+    count = 0
+    for item in positions:
+        file.write(pack_position(*item) if isinstance(item, tuple) else pack_position(item))
+        count += 1
+    return count
+
+
+class PackedFile:
+    # Arquivo de posições aberto com mmap: len(), acesso por índice e iteração sem cópia
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        size = self.file.seek(0, 2)
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.count = size // PACKED_SIZE
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not -self.count <= index < self.count:
+            raise IndexError(index)
+        return unpack_position(self.data, (index % self.count) * PACKED_SIZE)
+
+    def __iter__(self):
+        data = self.data
+        for offset in range(0, self.count * PACKED_SIZE, PACKED_SIZE):
+            yield unpack_position(data, offset)
+
+    def record(self, index):
+        # Bytes do registro, para mandar a outro processo sem decodificar
+        return bytes(self.data[index * PACKED_SIZE:(index + 1) * PACKED_SIZE])
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def fen_entries(path):
+    # (posição, meio-lances, número do lance) de um arquivo com uma FEN por linha
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield (Position.from_fen(line), *fen_counters(line))
+
+
+def pgn_entries(path):
+    # Cada posição (antes de cada lance) das partidas de um PGN
+    for game in iter_games(path):
+        for position, _ in replay(game):
+            yield position
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte FEN/PGN para posições binárias de tamanho fixo")
+    parser.add_argument('source', help="arquivo .fen (uma por linha) ou .pgn")
+    parser.add_argument('output', help="arquivo binário de saída")
+    parser.add_argument('--bench', action='store_true', help="compara a leitura do texto FEN e do binário")
+    args = parser.parse_args()
+
+    entries = pgn_entries(args.source) if args.source.endswith('.pgn') else fen_entries(args.source)
+    with open(args.output, 'wb') as file:
+        count = write_positions(file, entries)
+    print(f"{count} posições gravadas em {args.output} ({count * PACKED_SIZE} bytes)")
+
+    if args.bench and not args.source.endswith('.pgn'):
+        start = time.perf_counter()
+        fen_count = sum(1 for _ in fen_entries(args.source))
+        fen_time = time.perf_counter() - start
+        start = time.perf_counter()
+        with PackedFile(args.output) as packed:
+            packed_count = sum(1 for _ in packed)
+        packed_time = time.perf_counter() - start
+        print(f"FEN:     {fen_count / fen_time:10.0f} posições/s")
+        print(f"binário: {packed_count / packed_time:10.0f} posições/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# Análise em lote com vários processos
+#
+# As posições trafegam entre processos como texto FEN (e as jogadas como inteiros),
+# nunca como objetos JogoXadrez. Cada processo mantém um Engine próprio, com a sua
+# tabela de transposição reaproveitada entre os trabalhos que recebe, e abre os livros
+# (xadrez_book) por mmap: as páginas do arquivo ficam uma vez só no cache do sistema.
+#
+# Uso:
+#   python xadrez_parallel.py --fen FEN --depth 4          (divide as jogadas da raiz)
+#   python xadrez_parallel.py --file posicoes.fen --depth 3 (uma posição FEN por linha)
+#   python xadrez_parallel.py --file posicoes.fen --scaling (mede o ganho por número de processos)
+#   python xadrez_parallel.py --packed posicoes.bin --depth 3 (posições binárias de xadrez_pack.py)
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from xadrez_bitboard import START_FEN, Position, move_name
+from xadrez_book import Book
+from xadrez_engine import MATE, MAX_PLY, Engine
+from xadrez_pack import PackedFile, unpack_position
+
+_engine = None  # Um motor por processo de trabalho
+
+
+def _init_worker(tt_size, book_paths=()):
+    global _engine
+    _engine = Engine(tt_size=tt_size, books=[Book(path) for path in book_paths])
+
+
+class AnalysisResult:
+    def __init__(self, fen, move, score, depth, nodes, elapsed):
+        self.fen = fen
+        self.move = move  # Em notação de coordenadas ('e2e4'); None sem jogadas legais
+        self.score = score  # Do ponto de vista de quem joga em fen
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed = elapsed
+
+
+def analyse_position(fen, depth, time_limit=None):
+    # Trabalho de um processo: busca a melhor jogada de uma posição
+    result = _engine.search(Position.from_fen(fen), time_limit=time_limit or 0, max_depth=depth)
+    move = move_name(result.move) if result.move is not None else None
+    return AnalysisResult(fen, move, result.score, result.depth, result.nodes, result.elapsed)
+
+
+def analyse_record(record, depth, time_limit=None):
+    # Como analyse_position, mas recebe os bytes de um registro de xadrez_pack
+    position = unpack_position(record)[0]
+    result = _engine.search(position, time_limit=time_limit or 0, max_depth=depth)
+    move = move_name(result.move) if result.move is not None else None
+    return AnalysisResult(position.to_fen(), move, result.score, result.depth, result.nodes, result.elapsed)
+
+
+def analyse_root_move(fen, move, depth, time_limit=None):
+    # Trabalho de um processo: uma jogada da raiz, buscada com profundidade - 1
+    position = Position.from_fen(fen)
+    position.make_move(move)
+    result = _engine.search(position, time_limit=time_limit or 0, max_depth=max(depth - 1, 1))
+    # Mate visto do filho fica um meio-lance mais longe da raiz, como em Engine.search
+    score = -result.score
+    if score > MATE - MAX_PLY:
+        score -= 1
+    elif score < -MATE + MAX_PLY:
+        score += 1
+    return AnalysisResult(fen, move_name(move), score, result.depth + 1, result.nodes, result.elapsed)
+
+
+def _stream(jobs, workers, tt_size, books=()):
+    # Mantém no máximo 4 trabalhos por processo em andamento e devolve cada
+    # resultado assim que fica pronto, mesmo para entradas muito grandes
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(tt_size, tuple(books))) as executor:
+        pending = set()
+        jobs = iter(jobs)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < 4 * workers:
+                job = next(jobs, None)
+                if job is None:
+                    exhausted = True
+                else:
+                    pending.add(executor.submit(*job))
+            if pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+
+def analyse_positions(fens, depth, time_limit=None, workers=None, tt_size=1 << 16, books=()):
+    # Resultados em ordem de término, não de entrada (cada um traz o seu fen)
+    return _stream(((analyse_position, fen, depth, time_limit) for fen in fens), workers, tt_size, books)
+
+
+def analyse_records(records, depth, time_limit=None, workers=None, tt_size=1 << 16, books=()):
+    return _stream(((analyse_record, record, depth, time_limit) for record in records), workers, tt_size, books)
+
+
+def analyse_root_moves(fen, depth, time_limit=None, workers=None, tt_size=1 << 16):
+    # Cada jogada legal da raiz vira um trabalho; a melhor é a de maior pontuação
+    moves = Position.from_fen(fen).legal_moves()
+    return _stream(((analyse_root_move, fen, move, depth, time_limit) for move in moves), workers, tt_size)
+
+
+def read_fens(path):
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+
+def read_records(path):
+    # Registros de 40 bytes, lidos do mmap só quando o próximo trabalho é enviado
+    with PackedFile(path) as packed:
+        for index in range(len(packed)):
+            yield packed.record(index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Análise de posições em vários processos")
+    parser.add_argument('--fen', default=START_FEN)
+    parser.add_argument('--file', help="arquivo com uma posição FEN por linha")
+    parser.add_argument('--packed', help="arquivo de posições binárias (xadrez_pack.py)")
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--time', type=float, default=None, help="limite de segundos por trabalho")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--book', action='append', default=[], help="livro (xadrez_book.py) consultado antes de buscar")
+    parser.add_argument('--scaling', action='store_true', help="mede o tempo com 1, 2, 4... processos")
+    args = parser.parse_args()
+
+    if args.scaling:
+        fens = list(read_fens(args.file)) if args.file else [args.fen]
+        base = None
+        workers = 1
+        while workers <= (args.workers or os.cpu_count() or 1):
+            start = time.perf_counter()
+            if args.file:
+                nodes = sum(result.nodes for result in analyse_positions(fens, args.depth, args.time, workers))
+            else:
+                nodes = sum(result.nodes for result in analyse_root_moves(args.fen, args.depth, args.time, workers))
+            elapsed = time.perf_counter() - start
+            base = base or elapsed
+            print(f"{workers:3} processos: {elapsed:8.2f} s  {nodes / elapsed:10.0f} nós/s  ganho {base / elapsed:.2f}x")
+            workers *= 2
+        return
+
+    start = time.perf_counter()
+    if args.file or args.packed:
+        if args.packed:
+            results = analyse_records(read_records(args.packed), args.depth, args.time, args.workers,
+                                      books=args.book)
+        else:
+            results = analyse_positions(read_fens(args.file), args.depth, args.time, args.workers, books=args.book)
+        for result in results:
+            print(f"{result.move or '-':6} {result.score:>7} prof {result.depth:2}  {result.fen}", flush=True)
+    else:
+        best = None
+        for result in analyse_root_moves(args.fen, args.depth, args.time, args.workers):
+            print(f"{result.move:6} {result.score:>7} ({result.nodes} nós)", flush=True)
+            if best is None or result.score > best.score:
+                best = result
+        if best is None:
+            sys.exit("Sem jogadas legais")
+        print(f"melhor: {best.move} ({best.score})")
+    print(f"tempo: {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# Perft: conta as folhas da árvore de jogadas legais até uma profundidade
+#
+# Serve para medir a velocidade do gerador de jogadas e conferir que ele está
+# correto contra contagens conhecidas, sem abrir a janela do jogo.
+#
+# Uso:
+#   python xadrez_perft.py --depth 4 [--fen FEN] [--divide]
+#   python xadrez_perft.py --suite [--max-depth 3]
+
+import argparse
+import sys
+import time
+
+from xadrez_bitboard import CASTLE, EN_PASSANT, PROMOTION, START_FEN, Position, move_name
+
+# Posições de referência com as contagens conhecidas por profundidade:
+# (folhas, capturas, en passant, roques, promoções, xeques); None quando só o total é conhecido
+REFERENCE_POSITIONS = [
+    ("inicial", START_FEN, {
+        1: (20, 0, 0, 0, 0, 0),
+        2: (400, 0, 0, 0, 0, 0),
+        3: (8902, 34, 0, 0, 0, 12),
+        4: (197281, 1576, 0, 0, 0, 469),
+        5: (4865609, 82719, 258, 0, 0, 27351),
+    }),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", {
+        1: (48, 8, 0, 2, 0, 0),
+        2: (2039, 351, 1, 91, 0, 3),
+        3: (97862, 17102, 45, 3162, 0, 993),
+        4: (4085603, 757163, 1929, 128013, 15172, 25523),
+    }),
+    ("posicao 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", {
+        1: (14, 1, 0, 0, 0, 2),
+        2: (191, 14, 0, 0, 0, 10),
+        3: (2812, 209, 2, 0, 0, 267),
+        4: (43238, 3348, 123, 0, 0, 1680),
+        5: (674624, 52051, 1165, 0, 0, 52950),
+    }),
+    ("posicao 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", {
+        1: (6, 0, 0, 0, 0, 0),
+        2: (264, 87, 0, 6, 48, 10),
+        3: (9467, 1021, 4, 0, 120, 38),
+        4: (422333, 131393, 0, 7795, 60032, 15492),
+    }),
+    ("posicao 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", {
+        1: (44, None, None, None, None, None),
+        2: (1486, None, None, None, None, None),
+        3: (62379, None, None, None, None, None),
+        4: (2103487, None, None, None, None, None),
+    }),
+    ("posicao 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", {
+        1: (46, None, None, None, None, None),
+        2: (2079, None, None, None, None, None),
+        3: (89890, None, None, None, None, None),
+        4: (3894594, None, None, None, None, None),
+    }),
+]
+
+FIELDS = ('nodes', 'captures', 'en_passant', 'castles', 'promotions', 'checks')
+
+
+class PerftResult:
+    def __init__(self):
+        self.nodes = 0
+        self.captures = 0
+        self.en_passant = 0
+        self.castles = 0
+        self.promotions = 0
+        self.checks = 0
+
+    def as_tuple(self):
+        return tuple(getattr(self, field) for field in FIELDS)
+
+
+def perft(position, depth, result=None):
+    if result is None:
+        result = PerftResult()
+    if depth == 0:
+        result.nodes += 1
+        return result
+    moves = position.legal_moves()
+    if depth > 1:
+        for move in moves:
+            position.make_move(move)
+            perft(position, depth - 1, result)
+            position.unmake_move()
+        return result
+
+    # Último nível: classifica as folhas sem descer mais
+    mailbox = position.mailbox
+    for move in moves:
+        flag = (move >> 12) & 7
+        if flag == EN_PASSANT:
+            result.en_passant += 1
+            result.captures += 1
+        elif mailbox[(move >> 6) & 63]:
+            result.captures += 1
+        if flag == CASTLE:
+            result.castles += 1
+        elif flag == PROMOTION:
+            result.promotions += 1
+        position.make_move(move)
+        if position.is_in_check(position.turn):
+            result.checks += 1
+        position.unmake_move()
+    result.nodes += len(moves)
+    return result
+
+
+def divide(position, depth):
+    # Contagem separada por jogada da raiz, para localizar diferenças
+    counts = {}
+    for move in position.legal_moves():
+        position.make_move(move)
+        counts[move_name(move)] = perft(position, depth - 1).nodes if depth > 1 else 1
+        position.unmake_move()
+    return counts
+
+
+def timed_perft(fen, depth):
+    position = Position.from_fen(fen)
+    start = time.perf_counter()
+    result = perft(position, depth)
+    return result, time.perf_counter() - start
+
+
+def run_suite(max_depth, max_nodes):
+    failures = 0
+    for name, fen, expected in REFERENCE_POSITIONS:
+        for depth, counts in sorted(expected.items()):
+            if depth > max_depth or counts[0] > max_nodes:
+                continue
+            result, elapsed = timed_perft(fen, depth)
+            got = result.as_tuple()
+            ok = all(want is None or want == value for want, value in zip(counts, got))
+            failures += not ok
+            print(f"{'ok   ' if ok else 'FALHA'} {name:10} profundidade {depth}: {result.nodes:>9} folhas "
+                  f"{result.nodes / elapsed:>10.0f} nós/s")
+            if not ok:
+                print(f"      esperado {counts}\n      obtido   {got}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft do gerador de jogadas do xadrez")
+    parser.add_argument('--fen', default=START_FEN)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--divide', action='store_true', help="mostra a contagem de cada jogada da raiz")
+    parser.add_argument('--suite', action='store_true', help="confere as posições de referência")
+    parser.add_argument('--max-depth', type=int, default=4)
+    parser.add_argument('--max-nodes', type=int, default=500000)
+    args = parser.parse_args()
+
+    if args.suite:
+        sys.exit(1 if run_suite(args.max_depth, args.max_nodes) else 0)
+
+    if args.divide:
+        for name, count in sorted(divide(Position.from_fen(args.fen), args.depth).items()):
+            print(f"{name}: {count}")
+
+    result, elapsed = timed_perft(args.fen, args.depth)
+    for field, value in zip(FIELDS, result.as_tuple()):
+        print(f"{field:11} {value}")
+    print(f"tempo       {elapsed:.3f} s ({result.nodes / elapsed:.0f} nós/s)")
+
+
+if __name__ == "__main__":
+    main()
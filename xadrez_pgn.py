@@ -0,0 +1,240 @@
+# Leitura e escrita de partidas em PGN
+#
+# read_games() lê o arquivo linha a linha e devolve uma partida de cada vez, então
+# arquivos com milhões de partidas são percorridos com memória constante. As jogadas
+# ficam em notação algébrica (SAN) até serem reproduzidas com replay().
+#
+# Uso:
+#   python xadrez_pgn.py partidas.pgn            (conta partidas e jogadas, conferindo cada lance)
+#   python xadrez_pgn.py partidas.pgn --fens     (uma FEN por posição, para xadrez_parallel.py)
+
+import argparse
+import re
+import sys
+import time
+
+from xadrez_bitboard import (BLACK, CASTLE, EN_PASSANT, FEN_PIECES, PAWN, PROMOTION, START_FEN, Position, parse_square,
+                             square_name)
+
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+SEVEN_TAGS = ('Event', 'Site', 'Date', 'Round', 'White', 'Black', 'Result')
+
+TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+# Comentário {...} (talvez sem fechar nesta linha), comentário de linha, NAG, variações e palavras
+TOKEN = re.compile(r'\{[^}]*\}?|;.*|\$\d+|[()]|[^\s(){};$]+')
+MOVE_NUMBER = re.compile(r'^\d+\.+')
+SAN = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+
+
+class PgnGame:
+    def __init__(self, headers, moves, result):
+        self.headers = headers  # Pares de etiquetas, na ordem do arquivo
+        self.moves = moves  # Jogadas em SAN, sem números, comentários nem variações
+        self.result = result
+
+    def start_fen(self):
+        return self.headers.get('FEN', START_FEN)
+
+
+def read_games(lines):
+    # Gerador de PgnGame a partir de qualquer iterável de linhas (um arquivo aberto, por
+    # exemplo). Só a partida atual fica em memória.
+    headers, moves, result = {}, [], None
+    in_comment = False
+    in_movetext = False
+    depth = 0  # Nível de variação entre parênteses (ignoradas)
+    for line in lines:
+        if in_comment:
+            end = line.find('}')
+            if end < 0:
+                continue
+            line = line[end + 1:]
+            in_comment = False
+        stripped = line.strip()
+        if not stripped or stripped[0] == '%':
+            continue
+        if stripped[0] == '[' and not depth:
+            if in_movetext:  # Partida sem resultado no fim do texto de jogadas
+                yield PgnGame(headers, moves, result or '*')
+                headers, moves, result, in_movetext = {}, [], None, False
+            match = TAG.match(stripped)
+            if match:
+                headers[match.group(1)] = match.group(2).replace('\\"', '"').replace('\\\\', '\\')
+            continue
+
+        in_movetext = True
+        for token in TOKEN.findall(line):
+            first = token[0]
+            if first == '{':
+                in_comment = not token.endswith('}')
+            elif first == ';':
+                break
+            elif token == '(':
+                depth += 1
+            elif token == ')':
+                depth = max(depth - 1, 0)
+            elif depth or first == '$':
+                continue
+            elif token in RESULTS:
+                yield PgnGame(headers, moves, token)
+                headers, moves, result, in_movetext = {}, [], None, False
+            else:
+                token = token[MOVE_NUMBER.match(token).end():] if first.isdigit() and '.' in token else token
+                if token:
+                    moves.append(token)
+    if in_movetext or headers:
+        yield PgnGame(headers, moves, result or '*')
+
+
+def iter_games(path):
+    with open(path, encoding='utf-8', errors='replace') as file:
+        yield from read_games(file)
+
+
+def find_game(path, number):
+    # Partida `number` (contando de 1) do arquivo, ou None se ele tiver menos partidas
+    return next((game for index, game in enumerate(iter_games(path), 1) if index == number), None)
+
+
+def fen_counters(fen):
+    # (meio-lances, número do lance) dos dois últimos campos da FEN, que podem faltar
+    fields = fen.split()
+    return int(fields[4]) if len(fields) > 4 else 0, int(fields[5]) if len(fields) > 5 else 1
+
+
+def parse_san(position, san):
+    # Jogada (inteiro) correspondente ao SAN na posição; ValueError se não houver uma única legal
+    text = san.rstrip('+#!?')
+    color = position.turn
+    if text in ('O-O', '0-0', 'O-O-O', '0-0-0'):
+        king = position.king_sq[color]
+        target = king + (2 if len(text) == 3 else -2)
+        candidates = [move for move in position.legal_moves()
+                      if (move >> 12) & 7 == CASTLE and (move >> 6) & 63 == target]
+    else:
+        match = SAN.match(text)
+        if not match:
+            raise ValueError(f"jogada inválida: {san}")
+        piece, file, rank, target, promo = match.groups()
+        piece_type = FEN_PIECES.index(piece.lower()) if piece else PAWN
+        end = parse_square(target)
+        promo = FEN_PIECES.index(promo.lower()) if promo else None
+        candidates = []
+        for move in position.legal_moves():
+            start = move & 63
+            if (move >> 6) & 63 != end or position.mailbox[start][1] != piece_type:
+                continue
+            if file and square_name(start)[0] != file or rank and square_name(start)[1] != rank:
+                continue
+            if ((move >> 12) & 7 == PROMOTION) != (promo is not None) or promo is not None and move >> 15 != promo:
+                continue
+            candidates.append(move)
+    if len(candidates) != 1:
+        raise ValueError(f"jogada {'ambígua' if candidates else 'ilegal'}: {san}")
+    return candidates[0]
+
+
+def move_to_san(position, move, legal=None):
+    # SAN de uma jogada legal na posição (legal: lista de jogadas legais já calculada)
+    start, end, flag = move & 63, (move >> 6) & 63, (move >> 12) & 7
+    piece_type = position.mailbox[start][1]
+    if flag == CASTLE:
+        san = 'O-O' if end & 7 == 6 else 'O-O-O'
+    else:
+        capture = position.mailbox[end] is not None or flag == EN_PASSANT
+        if piece_type == PAWN:
+            san = square_name(start)[0] + 'x' if capture else ''
+        else:
+            san = FEN_PIECES[piece_type].upper()
+            # Desambiguação: coluna, linha ou as duas
+            others = [other & 63 for other in (legal if legal is not None else position.legal_moves())
+                      if other != move and (other >> 6) & 63 == end and other & 63 != start
+                      and position.mailbox[other & 63][1] == piece_type]
+            if others:
+                name = square_name(start)
+                if all(square_name(other)[0] != name[0] for other in others):
+                    san += name[0]
+                elif all(square_name(other)[1] != name[1] for other in others):
+                    san += name[1]
+                else:
+                    san += name
+            if capture:
+                san += 'x'
+        san += square_name(end)
+        if flag == PROMOTION:
+            san += '=' + FEN_PIECES[move >> 15].upper()
+    position.make_move(move)
+    if position.is_in_check(position.turn):
+        san += '+' if position.has_legal_moves() else '#'
+    position.unmake_move()
+    return san
+
+
+def replay(game, position=None):
+    # Gera (posição, jogada) antes de cada lance. A posição é o mesmo objeto, atualizado
+    # a cada passo: use position.copy() para guardá-la.
+    position = position or Position.from_fen(game.start_fen())
+    for san in game.moves:
+        move = parse_san(position, san)
+        yield position, move
+        position.make_move(move)
+
+
+def format_game(headers, moves, result='*', width=79):
+    # Texto PGN de uma partida; moves em SAN, a partir da posição das etiquetas (FEN ou inicial)
+    headers = dict(headers)
+    headers['Result'] = result
+    lines = [f'[{tag} "{headers.get(tag, "?")}"]' for tag in SEVEN_TAGS]
+    lines += [f'[{tag} "{value}"]' for tag, value in headers.items() if tag not in SEVEN_TAGS]
+    lines.append('')
+
+    start = Position.from_fen(headers.get('FEN', START_FEN))
+    _, number = fen_counters(headers.get('FEN', START_FEN))
+    black_first = start.turn == BLACK
+    tokens = []
+    for index, san in enumerate(moves):
+        if black_first:
+            if index == 0:
+                tokens.append(f'{number}...')
+            elif index % 2 == 1:
+                tokens.append(f'{number + (index + 1) // 2}.')
+        elif index % 2 == 0:
+            tokens.append(f'{number + index // 2}.')
+        tokens.append(san)
+    tokens.append(result)
+
+    line = ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > width:
+            lines.append(line)
+            line = token
+        else:
+            line = f'{line} {token}' if line else token
+    lines.append(line)
+    return '\n'.join(lines) + '\n\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lê um arquivo PGN partida a partida")
+    parser.add_argument('pgn')
+    parser.add_argument('--fens', action='store_true', help="imprime a FEN de cada posição")
+    args = parser.parse_args()
+
+    games = moves = errors = 0
+    start = time.perf_counter()
+    for game in iter_games(args.pgn):
+        games += 1
+        try:
+            for position, move in replay(game):
+                moves += 1
+                if args.fens:
+                    print(position.to_fen())
+        except ValueError as error:
+            errors += 1
+            print(f"partida {games}: {error}", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    print(f"{games} partidas, {moves} jogadas, {errors} com erro em {elapsed:.2f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
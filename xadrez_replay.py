@@ -0,0 +1,127 @@
+# Gravação e reprodução de partidas de xadrez (formato em recording.py)
+#
+# Cada jogada grava 4 bytes (o inteiro da jogada de xadrez_bitboard) e, a cada
+# KEYFRAME_INTERVAL jogadas, a posição antes dela no formato de 40 bytes de
+# xadrez_pack. Ir para qualquer jogada custa um unpack_position e no máximo
+# KEYFRAME_INTERVAL - 1 make_move, sem reler a partida desde o começo.
+#
+# Uso:
+#   python xadrez.py --record partida.rec           (grava cada jogada feita no tabuleiro)
+#   python xadrez.py --replay partida.rec [--start 40] [--replay-delay 500]
+#   python xadrez_replay.py partida.rec [--check]   (reproduz sem janela e mede)
+#   python xadrez_replay.py partida.rec --pgn partidas.pgn [--game 3]  (grava uma partida de um PGN)
+
+import argparse
+import random
+import struct
+import sys
+import time
+
+from recording import CHESS, Recorder, Recording
+from xadrez_bitboard import BLACK, PAWN, Position, move_name
+from xadrez_pack import pack_position, unpack_position
+from xadrez_pgn import fen_counters, find_game, parse_san
+
+MOVE_RECORD = struct.Struct('<I')
+KEYFRAME_INTERVAL = 32
+
+
+def advance(position, move, halfmove, fullmove):
+    # Faz a jogada e devolve os contadores da FEN depois dela
+    color, piece_type = position.mailbox[move & 63]
+    reset = piece_type == PAWN or position.mailbox[(move >> 6) & 63] is not None
+    position.make_move(move)
+    return 0 if reset else halfmove + 1, fullmove + (color == BLACK)
+
+
+class ChessRecorder:
+    def __init__(self, path, interval=KEYFRAME_INTERVAL):
+        self.log = Recorder(path, CHESS, MOVE_RECORD.size, interval)
+
+    def record(self, position, move, halfmove=0, fullmove=1):
+        # Chamado antes de position.make_move(move)
+        if self.log.due():
+            self.log.keyframe(pack_position(position, halfmove, fullmove))
+        self.log.record(MOVE_RECORD.pack(move))
+
+    def close(self):
+        self.log.close()
+
+
+class ChessReplay:
+    def __init__(self, path):
+        self.log = Recording(path, CHESS)
+        if not self.log.keyframes:
+            raise ValueError(f"{path} não tem nenhuma jogada gravada")
+
+    def __len__(self):
+        return self.log.count
+
+    def move(self, index):
+        return MOVE_RECORD.unpack(self.log.record(index))[0]
+
+    def seek(self, index):
+        # (posição, meio-lances, número do lance) depois de `index` jogadas gravadas
+        index = max(0, min(index, self.log.count))
+        start, snapshot = self.log.keyframe(index)
+        position, halfmove, fullmove = unpack_position(snapshot)
+        for ply in range(start, index):
+            halfmove, fullmove = advance(position, self.move(ply), halfmove, fullmove)
+        return position, halfmove, fullmove
+
+    def close(self):
+        self.log.close()
+
+
+def record_game(path, game):
+    # Grava as jogadas de uma partida lida por xadrez_pgn
+    recorder = ChessRecorder(path)
+    halfmove, fullmove = fen_counters(game.start_fen())
+    position = Position.from_fen(game.start_fen())
+    for san in game.moves:
+        move = parse_san(position, san)
+        recorder.record(position, move, halfmove, fullmove)
+        halfmove, fullmove = advance(position, move, halfmove, fullmove)
+    recorder.close()
+    return len(game.moves)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduz uma gravação de xadrez sem Tk e mede")
+    parser.add_argument('recording')
+    parser.add_argument('--pgn', help="grava antes uma partida deste PGN")
+    parser.add_argument('--game', type=int, default=1, help="número da partida no arquivo --pgn")
+    parser.add_argument('--check', action='store_true', help="confere se cada jogada gravada é legal")
+    parser.add_argument('--seeks', type=int, default=1000, help="saltos aleatórios medidos depois da reprodução")
+    args = parser.parse_args()
+
+    if args.pgn:
+        game = find_game(args.pgn, args.game)
+        if game is None:
+            sys.exit(f"{args.pgn} não tem a partida {args.game}")
+        print(f"{record_game(args.recording, game)} jogadas gravadas em {args.recording}")
+
+    recording = ChessReplay(args.recording)
+    start = time.perf_counter()
+    position, halfmove, fullmove = recording.seek(0)
+    for ply in range(len(recording)):
+        move = recording.move(ply)
+        if args.check and move not in position.legal_moves():
+            sys.exit(f"jogada {ply + 1} ({move_name(move)}) ilegal na posição {position.to_fen(halfmove, fullmove)}")
+        halfmove, fullmove = advance(position, move, halfmove, fullmove)
+    elapsed = time.perf_counter() - start
+    print(f"{len(recording)} jogadas reproduzidas em {elapsed * 1000:.1f} ms: "
+          f"{len(recording) / max(elapsed, 1e-9):.0f} jogadas/s")
+    print(position.to_fen(halfmove, fullmove))
+
+    if args.seeks:
+        rng = random.Random(0)
+        start = time.perf_counter()
+        for _ in range(args.seeks):
+            recording.seek(rng.randrange(len(recording) + 1))
+        print(f"{(time.perf_counter() - start) / args.seeks * 1e6:.0f} µs por salto")
+    recording.close()
+
+
+if __name__ == "__main__":
+    main()